@@ -24,7 +24,7 @@ from calculations import (
     analyze_retirement_plan
 )
 from auth_db import get_auth_manager
-from user_data import UserDataManager
+from user_data import get_user_data_manager
 
 # Page configuration
 st.set_page_config(
@@ -335,17 +335,18 @@ elif authentication_status == None:
 # ===== USER IS AUTHENTICATED =====
 
 # Initialize user data manager
-db_manager = UserDataManager()
+db_manager = get_user_data_manager()
 
 # Load user-specific data or create defaults
 if not db_manager.user_exists(username):
     db_manager.create_default_data_for_user(username)
 
 # Load user's saved data
-user_profile = db_manager.load_user_profile(username)
-user_accounts = db_manager.load_user_accounts(username)
-user_expenses = db_manager.load_user_expenses(username)
-user_events = db_manager.load_user_events(username)
+user_bundle = db_manager.load_user_bundle(username)
+user_profile = user_bundle['profile']
+user_accounts = user_bundle['accounts']
+user_expenses = user_bundle['expenses']
+user_events = user_bundle['events']
 
 # Initialize session state for dynamic lists if not already set
 if 'expense_categories' not in st.session_state:
@@ -386,10 +387,11 @@ with data_col:
             "events": user_events
         }
         
-        # Add snapshots for each account
+        # Add snapshots for each account (fetched in one query)
+        stored_snapshots = db_manager.load_all_snapshots(username)
         all_snapshots = {}
         for account in user_accounts:
-            snapshots = db_manager.load_snapshots(username, account['name'])
+            snapshots = stored_snapshots.get(account['name'])
             if snapshots:
                 all_snapshots[account['name']] = snapshots
         
@@ -605,18 +607,16 @@ if st.session_state.get('show_import', False):
                         # Import snapshots
                         if importable_sections['snapshots']:
                             try:
-                                snapshot_count = 0
-                                for account_name, snapshots in imported_data['snapshots'].items():
-                                    for snapshot in snapshots:
-                                        if all(k in snapshot for k in ['date', 'contributed', 'total_value']):
-                                            db_manager.save_snapshot(
-                                                username,
-                                                account_name,
-                                                snapshot['date'],
-                                                snapshot['contributed'],
-                                                snapshot['total_value']
-                                            )
-                                            snapshot_count += 1
+                                snapshot_rows = [
+                                    (account_name, snapshot['date'],
+                                     snapshot['contributed'], snapshot['total_value'])
+                                    for account_name, snapshots in imported_data['snapshots'].items()
+                                    for snapshot in snapshots
+                                    if all(k in snapshot for k in ['date', 'contributed', 'total_value'])
+                                ]
+                                # One executemany and one commit for the whole history
+                                db_manager.save_snapshots(username, snapshot_rows)
+                                snapshot_count = len(snapshot_rows)
                                 if snapshot_count > 0:
                                     import_results.append(f"✅ Snapshots ({snapshot_count})")
                             except Exception as e:
@@ -1279,8 +1279,13 @@ with config_tabs[2]:
     # Add new account button
     if st.button("Add Account"):
         new_index = len(st.session_state.accounts)
+        # Numbering by position repeats a name after an account is deleted
+        existing_names = {acc['name'] for acc in st.session_state.accounts}
+        name_number = new_index + 1
+        while f'Account {name_number}' in existing_names:
+            name_number += 1
         st.session_state.accounts.append({
-            'name': f'Account {new_index + 1}',
+            'name': f'Account {name_number}',
             'account_type': 'taxable_brokerage',
             'balance': 100,
             'return': 0.08,
@@ -13,6 +13,61 @@ import streamlit_authenticator as stauth
 from db_connection import get_db
 
 
+_SQL_COOKIE_KEY = "SELECT cookie_key FROM auth_config WHERE id = 1"
+
+_SQL_INIT_COOKIE_CONFIG = "INSERT INTO auth_config (id, cookie_key) VALUES (1, ?)"
+
+_SQL_COOKIE_CONFIG = """
+    SELECT cookie_name, cookie_key, cookie_expiry_days
+    FROM auth_config WHERE id = 1
+"""
+
+# Existence probes stop at the first (primary-key) match instead of counting
+_SQL_ANY_USER = "SELECT 1 FROM users LIMIT 1"
+
+_SQL_USER_EXISTS = "SELECT 1 FROM users WHERE username = ? LIMIT 1"
+
+_SQL_ALL_CREDENTIALS = "SELECT username, name, email, password_hash FROM users"
+
+_SQL_INSERT_USER = """
+    INSERT INTO users (username, name, email, password_hash)
+    VALUES (?, ?, ?, ?)
+"""
+
+_SQL_SET_PASSWORD = """
+    UPDATE users
+    SET password_hash = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE username = ?
+"""
+
+_SQL_SET_RECOVERY_CODE = """
+    UPDATE users
+    SET recovery_code_hash = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE username = ?
+"""
+
+_SQL_RECOVERY_CODE = "SELECT recovery_code_hash FROM users WHERE username = ?"
+
+_SQL_SET_SECURITY_QUESTION = """
+    UPDATE users
+    SET security_question = ?, security_answer_hash = ?,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE username = ?
+"""
+
+_SQL_SECURITY_QUESTION = "SELECT security_question FROM users WHERE username = ?"
+
+_SQL_SECURITY_ANSWER = "SELECT security_answer_hash FROM users WHERE username = ?"
+
+_SQL_USER_EMAIL = "SELECT email FROM users WHERE username = ?"
+
+_SQL_SET_EMAIL = """
+    UPDATE users
+    SET email = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE username = ?
+"""
+
+
 class AuthManager:
     """Manages user authentication with database persistence."""
     
@@ -47,29 +102,25 @@ class AuthManager:
         """)
         
         # Initialize cookie config if not exists
-        rows = self.db.execute_query("SELECT cookie_key FROM auth_config WHERE id = 1")
+        rows = self.db.execute_query(_SQL_COOKIE_KEY)
         if not rows:
             cookie_key = secrets.token_urlsafe(32)
-            self.db.execute_update(
-                "INSERT INTO auth_config (id, cookie_key) VALUES (1, ?)",
-                (cookie_key,)
-            )
+            self.db.execute_update(_SQL_INIT_COOKIE_CONFIG, (cookie_key,))
     
     def _ensure_admin_exists(self):
         """Create default admin account if no users exist."""
-        rows = self.db.execute_query("SELECT COUNT(*) FROM users")
-        user_count = rows[0][0] if rows else 0
-        
-        if user_count == 0:
+        if not self.db.execute_query(_SQL_ANY_USER):
             # Create default admin account
             hashed_password = stauth.Hasher.hash('admin')
-            self.db.execute_update("""
-                INSERT INTO users (username, name, email, password_hash)
-                VALUES (?, ?, ?, ?)
-            """, ('admin', 'Administrator', 'admin@example.com', hashed_password))
+            self.db.execute_update(_SQL_INSERT_USER, (
+                'admin', 'Administrator', 'admin@example.com', hashed_password))
             print("⚠️  Created default admin account (username: admin, password: admin)")
             print("⚠️  IMPORTANT: Change the admin password immediately!")
     
+    def _user_exists(self, username: str) -> bool:
+        """Check whether a username is registered."""
+        return bool(self.db.execute_query(_SQL_USER_EXISTS, (username,)))
+    
     def get_credentials_config(self) -> Dict:
         """
         Get credentials in the format expected by streamlit-authenticator.
@@ -78,10 +129,7 @@ class AuthManager:
             Dictionary with credentials, cookie, and preauthorized config
         """
         # Load all users
-        rows = self.db.execute_query("""
-            SELECT username, name, email, password_hash 
-            FROM users
-        """)
+        rows = self.db.execute_query(_SQL_ALL_CREDENTIALS)
         
         usernames = {}
         for row in rows:
@@ -92,10 +140,7 @@ class AuthManager:
             }
         
         # Load cookie config
-        cookie_rows = self.db.execute_query("""
-            SELECT cookie_name, cookie_key, cookie_expiry_days 
-            FROM auth_config WHERE id = 1
-        """)
+        cookie_rows = self.db.execute_query(_SQL_COOKIE_CONFIG)
         
         if cookie_rows:
             cookie_name, cookie_key, cookie_expiry = cookie_rows[0]
@@ -133,21 +178,14 @@ class AuthManager:
             bool: True if successful, False if username already exists
         """
         # Check if username already exists
-        rows = self.db.execute_query(
-            "SELECT COUNT(*) FROM users WHERE username = ?",
-            (username,)
-        )
-        if rows and rows[0][0] > 0:
+        if self._user_exists(username):
             return False
         
         # Hash the password
         hashed_password = stauth.Hasher.hash(password)
         
         # Insert new user
-        self.db.execute_update("""
-            INSERT INTO users (username, name, email, password_hash)
-            VALUES (?, ?, ?, ?)
-        """, (username, name, email, hashed_password))
+        self.db.execute_update(_SQL_INSERT_USER, (username, name, email, hashed_password))
         
         return True
     
@@ -163,22 +201,14 @@ class AuthManager:
             bool: True if successful, False if user doesn't exist
         """
         # Check if user exists
-        rows = self.db.execute_query(
-            "SELECT COUNT(*) FROM users WHERE username = ?",
-            (username,)
-        )
-        if not rows or rows[0][0] == 0:
+        if not self._user_exists(username):
             return False
         
         # Hash the new password
         hashed_password = stauth.Hasher.hash(new_password)
         
         # Update password
-        self.db.execute_update("""
-            UPDATE users 
-            SET password_hash = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE username = ?
-        """, (hashed_password, username))
+        self.db.execute_update(_SQL_SET_PASSWORD, (hashed_password, username))
         
         return True
     
@@ -202,20 +232,12 @@ class AuthManager:
             bool: True if successful, False if user doesn't exist
         """
         # Check if user exists
-        rows = self.db.execute_query(
-            "SELECT COUNT(*) FROM users WHERE username = ?",
-            (username,)
-        )
-        if not rows or rows[0][0] == 0:
+        if not self._user_exists(username):
             return False
         
         # Hash and store the recovery code
         hashed_code = self.hash_recovery_code(recovery_code)
-        self.db.execute_update("""
-            UPDATE users 
-            SET recovery_code_hash = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE username = ?
-        """, (hashed_code, username))
+        self.db.execute_update(_SQL_SET_RECOVERY_CODE, (hashed_code, username))
         
         return True
     
@@ -230,10 +252,7 @@ class AuthManager:
         Returns:
             bool: True if code matches, False otherwise
         """
-        rows = self.db.execute_query(
-            "SELECT recovery_code_hash FROM users WHERE username = ?",
-            (username,)
-        )
+        rows = self.db.execute_query(_SQL_RECOVERY_CODE, (username,))
         
         if not rows or not rows[0][0]:
             return False
@@ -254,23 +273,14 @@ class AuthManager:
             bool: True if successful, False if user doesn't exist
         """
         # Check if user exists
-        rows = self.db.execute_query(
-            "SELECT COUNT(*) FROM users WHERE username = ?",
-            (username,)
-        )
-        if not rows or rows[0][0] == 0:
+        if not self._user_exists(username):
             return False
         
         # Hash the answer
         answer_hash = hashlib.sha256(answer.lower().strip().encode()).hexdigest()
         
         # Update security question and answer
-        self.db.execute_update("""
-            UPDATE users 
-            SET security_question = ?, security_answer_hash = ?, 
-                updated_at = CURRENT_TIMESTAMP
-            WHERE username = ?
-        """, (question, answer_hash, username))
+        self.db.execute_update(_SQL_SET_SECURITY_QUESTION, (question, answer_hash, username))
         
         return True
     
@@ -284,10 +294,7 @@ class AuthManager:
         Returns:
             str: Security question, or None if not set
         """
-        rows = self.db.execute_query(
-            "SELECT security_question FROM users WHERE username = ?",
-            (username,)
-        )
+        rows = self.db.execute_query(_SQL_SECURITY_QUESTION, (username,))
         
         if rows and rows[0][0]:
             return rows[0][0]
@@ -304,10 +311,7 @@ class AuthManager:
         Returns:
             bool: True if answer matches, False otherwise
         """
-        rows = self.db.execute_query(
-            "SELECT security_answer_hash FROM users WHERE username = ?",
-            (username,)
-        )
+        rows = self.db.execute_query(_SQL_SECURITY_ANSWER, (username,))
         
         if not rows or not rows[0][0]:
             return False
@@ -318,10 +322,7 @@ class AuthManager:
     
     def get_user_email(self, username: str) -> Optional[str]:
         """Get a user's email address."""
-        rows = self.db.execute_query(
-            "SELECT email FROM users WHERE username = ?",
-            (username,)
-        )
+        rows = self.db.execute_query(_SQL_USER_EMAIL, (username,))
         
         if rows:
             return rows[0][0]
@@ -329,18 +330,10 @@ class AuthManager:
     
     def update_user_email(self, username: str, email: str) -> bool:
         """Update a user's email address."""
-        rows = self.db.execute_query(
-            "SELECT COUNT(*) FROM users WHERE username = ?",
-            (username,)
-        )
-        if not rows or rows[0][0] == 0:
+        if not self._user_exists(username):
             return False
         
-        self.db.execute_update("""
-            UPDATE users 
-            SET email = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE username = ?
-        """, (email, username))
+        self.db.execute_update(_SQL_SET_EMAIL, (email, username))
         
         return True
 
@@ -0,0 +1,37 @@
+"""
+Ahead-of-time build of the numba projection kernels
+
+Compiles the scalar kernels used by run_comprehensive_projection() into a
+``projection_kernels`` extension module next to calculations.py, so the app
+and the test suite import machine code instead of JIT-compiling it in every
+new process. calculations.py uses the module when it is present and falls
+back to numba's JIT (or plain Python) otherwise.
+
+Requires numba and a C compiler. Rerun after changing a kernel.
+
+Usage:
+    python build_numba_kernels.py
+"""
+
+import os
+
+
+def build_kernels():
+    """Compile the kernels into projection_kernels (skipped without numba)."""
+    try:
+        from numba.pycc import CC
+    except ImportError:
+        print("✓ numba not installed - skipping kernel build (pure Python fallback).")
+        return
+
+    from calculations import _fund_from_income_impl
+
+    cc = CC("projection_kernels")
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export("fund_from_income", "UniTuple(f8, 4)(f8, f8, f8, f8)")(_fund_from_income_impl)
+    cc.compile()
+    print(f"✓ Built projection_kernels in {cc.output_dir}")
+
+
+if __name__ == "__main__":
+    build_kernels()
@@ -12,10 +12,19 @@ Key Features:
 - Transparent year-by-year projection
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Collection, Dict, List, Literal, Optional, Union
 from dataclasses import dataclass
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels run as plain Python without it
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
 
 @dataclass
 class AccountBucket:
@@ -128,15 +137,9 @@ def calculate_rmd_amount(account_balance: float, age: int, rmd_starting_age: int
     return account_balance / divisor
 
 
-def can_contribute(account_type: str, age: int, work_end_age: int, continue_post_retirement: bool = False) -> bool:
-    """Check if an account type is eligible for contributions at a given age.
-    
-    Args:
-        account_type: Type of account (401k, traditional_ira, roth_ira, taxable_brokerage)
-        age: Current age
-        work_end_age: Age when work income stops
-        continue_post_retirement: If True, allows contributions after work_end_age for eligible accounts
-    """
+def _can_contribute_impl(account_type: str, age: int, work_end_age: int,
+                         continue_post_retirement: bool = False) -> bool:
+    """Contribution eligibility rules behind can_contribute() (also accepts age arrays)."""
     rule = CONTRIBUTION_STOP_RULES.get(account_type)
     
     # For accounts with no age limit (Roth IRA, Taxable Brokerage)
@@ -158,11 +161,43 @@ def can_contribute(account_type: str, age: int, work_end_age: int, continue_post
         if continue_post_retirement:
             return age < rule
         # Otherwise, stop at work_end_age even if under the age limit
-        return age < work_end_age and age < rule
+        return (age < work_end_age) & (age < rule)
     
     return age < rule
 
 
+# Every scalar (account type, age, work_end_age, continue flag) answer over the
+# ages the app allows, computed once so can_contribute() is a dict lookup.
+_CONTRIBUTE_TABLE_AGES = range(18, 101)
+_CONTRIBUTE_TABLE = {
+    (account_type, age, work_end_age, continue_post_retirement):
+        _can_contribute_impl(account_type, age, work_end_age, continue_post_retirement)
+    for account_type in CONTRIBUTION_STOP_RULES
+    for age in _CONTRIBUTE_TABLE_AGES
+    for work_end_age in _CONTRIBUTE_TABLE_AGES
+    for continue_post_retirement in (False, True)
+}
+
+
+def can_contribute(account_type: str, age: int, work_end_age: int, continue_post_retirement: bool = False) -> bool:
+    """Check if an account type is eligible for contributions at a given age.
+    
+    ``age`` may also be a NumPy array of ages, in which case a boolean mask
+    is returned (or a plain ``True`` for accounts that never stop).
+    
+    Args:
+        account_type: Type of account (401k, traditional_ira, roth_ira, taxable_brokerage)
+        age: Current age (int or NumPy array of ages)
+        work_end_age: Age when work income stops
+        continue_post_retirement: If True, allows contributions after work_end_age for eligible accounts
+    """
+    try:
+        return _CONTRIBUTE_TABLE[(account_type, age, work_end_age, bool(continue_post_retirement))]
+    except (KeyError, TypeError):
+        # Outside the precomputed range, or an array of ages (unhashable)
+        return _can_contribute_impl(account_type, age, work_end_age, continue_post_retirement)
+
+
 def generate_historical_rows(
     historical_summaries: List[Dict],
     current_age: int,
@@ -220,6 +255,164 @@ def generate_historical_rows(
     return historical_rows
 
 
+def _accounts_to_soa(accounts: List[AccountBucket]) -> Dict[str, np.ndarray]:
+    """
+    Convert a list of accounts into parallel arrays (struct-of-arrays).
+
+    Element i of every array describes accounts[i]:
+    - balances, returns, planned_contributions: float64
+    - priorities: withdrawal order (lower = earlier)
+    - rmd_eligible: True for account types subject to RMDs
+    """
+    return {
+        'balances': np.array([acc.balance for acc in accounts], dtype=np.float64),
+        'returns': np.array([acc.annual_return for acc in accounts], dtype=np.float64),
+        'priorities': np.array([acc.priority for acc in accounts], dtype=np.int64),
+        'planned_contributions': np.array([acc.planned_contribution for acc in accounts],
+                                          dtype=np.float64),
+        'rmd_eligible': np.array([acc.account_type in RMD_ACCOUNT_TYPES for acc in accounts],
+                                 dtype=bool),
+    }
+
+
+def _fund_from_income_impl(
+    available_for_all: float,
+    flex_expenses_full: float,
+    total_planned: float,
+    max_flex_reduction: float
+):
+    """
+    Split income left after core expenses between flex spending and contributions.
+
+    Contributions are prioritized over flex spending: flex is reduced (down to
+    1 - max_flex_reduction of its full amount) to make room for them, and any
+    money still missing becomes a contribution shortfall.
+
+    Used as _fund_from_income(): the ahead-of-time compiled kernel from
+    build_numba_kernels.py if it has been built, otherwise JIT-compiled
+    with numba when it is installed.
+
+    Returns:
+        (flex_expenses_actual, flex_multiplier, investment_contributions,
+         contribution_shortfall). Contributions are either the full
+        total_planned or a partial amount to be split proportionally.
+    """
+    min_flex = flex_expenses_full * (1 - max_flex_reduction)
+
+    if available_for_all >= flex_expenses_full + total_planned:
+        # Enough income to cover everything: full flex + full contributions
+        return flex_expenses_full, 1.0, total_planned, 0.0
+
+    if available_for_all >= total_planned:
+        # Enough for contributions but not full flex spending.
+        # Reduce flex to make room for contributions.
+        money_for_flex = available_for_all - total_planned
+
+        if money_for_flex >= min_flex:
+            # Flex reduction was enough to fund all contributions
+            flex_multiplier = (money_for_flex / flex_expenses_full
+                               if flex_expenses_full > 0 else 1.0)
+            return money_for_flex, flex_multiplier, total_planned, 0.0
+
+        # Even max flex reduction wasn't enough; fund what we can
+        money_after_min_flex = available_for_all - min_flex
+        if total_planned > 0:
+            return (min_flex, 1 - max_flex_reduction, money_after_min_flex,
+                    total_planned - money_after_min_flex)
+        return min_flex, 1 - max_flex_reduction, 0.0, 0.0
+
+    # Not even enough income to cover core expenses + contributions.
+    # Reduce flex to minimum. Contribute what we can after that.
+    flex_multiplier = 1 - max_flex_reduction if flex_expenses_full > 0 else 1.0
+    money_after_min_flex = available_for_all - min_flex
+
+    if money_after_min_flex > 0 and total_planned > 0:
+        # Some money left for partial contributions
+        return (min_flex, flex_multiplier, money_after_min_flex,
+                total_planned - money_after_min_flex)
+
+    # No money for contributions at all
+    return min_flex, flex_multiplier, 0.0, total_planned
+
+
+try:
+    # Prebuilt with: python build_numba_kernels.py
+    from projection_kernels import fund_from_income as _fund_from_income
+except ImportError:
+    _fund_from_income = njit(cache=True)(_fund_from_income_impl)
+
+
+def _age_schedules(
+    n_years: int,
+    current_age,
+    current_work_income,
+    work_end_age,
+    ss_start_age,
+    ss_monthly_benefit,
+    ss_cola,
+    inflation_rate
+) -> Dict[str, np.ndarray]:
+    """
+    Build the age-driven yearly schedules used by the projection.
+
+    Scalar inputs give 1-D arrays of length n_years. 1-D array inputs (one
+    value per scenario) broadcast to (n_scenarios, n_years) arrays.
+
+    - Work income grows at the inflation rate and stops at work_end_age
+    - Social Security starts at ss_start_age and grows by COLA each year
+    """
+    def per_scenario(value):
+        return np.asarray(value)[..., np.newaxis]
+
+    year_offsets = np.arange(max(n_years, 0))
+    ages = per_scenario(current_age) + year_offsets
+    inflation_multipliers = (1 + per_scenario(inflation_rate)) ** year_offsets
+
+    working = ages < per_scenario(work_end_age)
+    work_income = per_scenario(current_work_income) * inflation_multipliers * working
+
+    ss_active = ages >= per_scenario(ss_start_age)
+    ss_years = np.maximum(ages - per_scenario(ss_start_age), 0)
+    ss_income = (per_scenario(ss_monthly_benefit) * 12
+                 * (1 + per_scenario(ss_cola)) ** ss_years * ss_active)
+
+    return {
+        'age': ages,
+        'inflation_multiplier': inflation_multipliers,
+        'work_income': work_income,
+        'ss_income': ss_income,
+    }
+
+
+def project_schedules_batch(
+    scenarios: Dict[str, np.ndarray],
+    n_years: int
+) -> Dict[str, np.ndarray]:
+    """
+    Compute age-based income schedules for many scenarios in one NumPy pass.
+
+    Each entry of ``scenarios`` is a 1-D array with one value per scenario:
+    current_age, current_work_income, work_end_age, ss_start_age and
+    ss_monthly_benefit are required; ss_cola and inflation_rate default to the
+    same values as run_comprehensive_projection().
+
+    Returns:
+        Dictionary of (n_scenarios, n_years) arrays: 'age', 'work_income',
+        'ss_income' and 'inflation_multiplier'. Row i matches the corresponding
+        columns of run_comprehensive_projection() for scenario i.
+    """
+    return _age_schedules(
+        n_years,
+        scenarios['current_age'],
+        scenarios['current_work_income'],
+        scenarios['work_end_age'],
+        scenarios['ss_start_age'],
+        scenarios['ss_monthly_benefit'],
+        scenarios.get('ss_cola', 0.025),
+        scenarios.get('inflation_rate', 0.03),
+    )
+
+
 def run_comprehensive_projection(
     # Personal info
     current_age: int,
@@ -246,8 +439,10 @@ def run_comprehensive_projection(
     inflation_rate: float = 0.03,
     max_age: int = 110,
     ultimate_max_age: int = 110,
-    historical_summaries: Optional[List[Dict]] = None
-) -> pd.DataFrame:
+    historical_summaries: Optional[List[Dict]] = None,
+    columns: Optional[Collection[str]] = None,
+    return_format: Literal['dataframe', 'dict'] = 'dataframe'
+) -> Union[pd.DataFrame, Dict[str, np.ndarray]]:
     """
     Year-by-year retirement projection.
 
@@ -264,9 +459,15 @@ def run_comprehensive_projection(
         ultimate_max_age: The maximum age to project to (default 110)
         max_age: Deprecated, use ultimate_max_age instead
         historical_summaries: Optional list of historical year summaries from snapshots
+        columns: Optional subset of columns to return. Per-account detail columns
+            that aren't requested are never recorded. Default returns everything.
+        return_format: 'dataframe' (default) or 'dict' for a {column: ndarray}
+            mapping with the same columns, skipping DataFrame construction.
 
     Returns:
         DataFrame with one row per year of the projection, with historical data prepended.
+        The projection stops at the first year the portfolio is depleted, so that
+        year is always the last row.
     """
     if events is None:
         events = []
@@ -289,11 +490,35 @@ def run_comprehensive_projection(
         historical_rows = generate_historical_rows(historical_summaries, current_age, current_year)
         results.extend(historical_rows)
 
-    # Sort accounts by priority for withdrawal ordering
-    sorted_accounts = sorted(accounts, key=lambda a: a.priority)
-
-    # Initialize account balances (modified each year)
-    account_balances = {acc.name: acc.balance for acc in accounts}
+    wanted_columns = set(columns) if columns is not None else None
+
+    # Per-account detail columns to record each year: (column, source, account index)
+    account_detail_columns = [
+        (f'{acc.name}_{suffix}', suffix, i)
+        for i, acc in enumerate(accounts)
+        for suffix in ('balance', 'contribution', 'withdrawal',
+                       'contribution_withdrawal', 'rmd', 'return')
+        if wanted_columns is None or f'{acc.name}_{suffix}' in wanted_columns
+    ]
+
+    # Account state is held as parallel arrays (one slot per account, in input
+    # order) so each yearly step is a single array operation over all accounts.
+    account_data = _accounts_to_soa(accounts)
+    balances = account_data['balances'].copy()  # Modified each year
+    account_returns = account_data['returns']
+    rmd_eligible = account_data['rmd_eligible']
+    n_accounts = len(accounts)
+    account_index = {acc.name: i for i, acc in enumerate(accounts)}
+
+    # Withdrawal ordering by priority (stable, so ties keep input order)
+    withdrawal_order = np.argsort(account_data['priorities'], kind='stable')
+    withdrawal_order_list = withdrawal_order.tolist()
+
+    # Index events by calendar year once so each year is a single lookup.
+    # Only the first event listed for a given year is applied.
+    events_by_year: Dict[int, OneTimeEvent] = {}
+    for event in events:
+        events_by_year.setdefault(event.year, event)
 
     # Base-year expense totals (before inflation)
     core_expenses_base = sum(e.annual_amount for e in expense_categories
@@ -301,44 +526,51 @@ def run_comprehensive_projection(
     flex_expenses_base = sum(e.annual_amount for e in expense_categories
                              if e.category_type == 'FLEX')
 
+    # --- AGE-BASED SCHEDULES ---
+    # Income, inflation and contribution eligibility depend only on age,
+    # so build them for every projection year up front with boolean masks.
+
+    schedules = _age_schedules(
+        projection_years, current_age, current_work_income, work_end_age,
+        ss_start_age, ss_monthly_benefit, ss_cola, inflation_rate
+    )
+    ages = schedules['age']
+    work_income_by_year = schedules['work_income'].tolist()
+    ss_income_by_year = schedules['ss_income'].tolist()
+    inflation_by_year = schedules['inflation_multiplier'].tolist()
+
+    # Planned contribution per account (rows) and year (columns), zeroed in
+    # years the account can't accept one
+    eligible = np.array([
+        np.broadcast_to(
+            _can_contribute_impl(acc.account_type, ages, work_end_age, acc.continue_post_retirement),
+            ages.shape
+        )
+        for acc in accounts
+    ], dtype=bool).reshape(n_accounts, len(ages))
+    planned_by_year = np.where(eligible, account_data['planned_contributions'][:, np.newaxis], 0.0)
+
     for year_offset in range(projection_years):
         age = current_age + year_offset
         year = current_year + year_offset
 
         # --- INCOME ---
 
-        # Work income grows at inflation rate, stops at work_end_age
-        if age < work_end_age:
-            work_income = current_work_income * ((1 + inflation_rate) ** year_offset)
-        else:
-            work_income = 0
-
-        # Social Security starts at ss_start_age with annual COLA
-        if age >= ss_start_age:
-            years_on_ss = age - ss_start_age
-            ss_income = ss_monthly_benefit * 12 * ((1 + ss_cola) ** years_on_ss)
-        else:
-            ss_income = 0
-
+        work_income = work_income_by_year[year_offset]
+        ss_income = ss_income_by_year[year_offset]
         total_income = work_income + ss_income
 
         # --- EXPENSES ---
 
-        inflation_multiplier = (1 + inflation_rate) ** year_offset
+        inflation_multiplier = inflation_by_year[year_offset]
         core_expenses = core_expenses_base * inflation_multiplier
         flex_expenses_full = flex_expenses_base * inflation_multiplier
 
         # --- PLANNED CONTRIBUTIONS ---
-        # Figure out which accounts are eligible and what they want
+        # Eligibility was resolved above; pick this year's amount per account
 
-        planned = {}
-        for acc in accounts:
-            if can_contribute(acc.account_type, age, work_end_age, acc.continue_post_retirement):
-                planned[acc.name] = acc.planned_contribution
-            else:
-                planned[acc.name] = 0
-
-        total_planned = sum(planned.values())
+        planned = planned_by_year[:, year_offset]
+        total_planned = float(planned.sum())
 
         # --- FUNDING CONTRIBUTIONS FROM SURPLUS ---
         # Surplus = income - core expenses - flex expenses
@@ -348,114 +580,63 @@ def run_comprehensive_projection(
         available_for_all = total_income - core_expenses
         # This must cover both flex expenses and contributions
 
-        flex_expenses_actual = flex_expenses_full
-        flex_multiplier = 1.0
-        investment_contributions = 0
-        contributions = {}
-        contribution_shortfall = 0
-
-        if available_for_all >= flex_expenses_full + total_planned:
-            # Enough income to cover everything: full flex + full contributions
-            flex_expenses_actual = flex_expenses_full
-            flex_multiplier = 1.0
-            contributions = dict(planned)
-            investment_contributions = total_planned
-
-        elif available_for_all >= total_planned:
-            # Enough for contributions but not full flex spending.
-            # Reduce flex to make room for contributions.
-            money_for_flex = available_for_all - total_planned
-            flex_expenses_actual = max(
-                money_for_flex,
-                flex_expenses_full * (1 - max_flex_reduction)
-            )
-            flex_multiplier = (flex_expenses_actual / flex_expenses_full
-                               if flex_expenses_full > 0 else 1.0)
-
-            if money_for_flex >= flex_expenses_full * (1 - max_flex_reduction):
-                # Flex reduction was enough to fund all contributions
-                contributions = dict(planned)
-                investment_contributions = total_planned
-            else:
-                # Even max flex reduction wasn't enough; fund what we can
-                money_after_min_flex = (available_for_all
-                                        - flex_expenses_full * (1 - max_flex_reduction))
-                flex_expenses_actual = flex_expenses_full * (1 - max_flex_reduction)
-                flex_multiplier = 1 - max_flex_reduction
-
-                # Distribute available money proportionally across planned contributions
-                if total_planned > 0:
-                    for acc_name, amt in planned.items():
-                        share = amt / total_planned
-                        contributions[acc_name] = money_after_min_flex * share
-                    investment_contributions = money_after_min_flex
-                    contribution_shortfall = total_planned - investment_contributions
-                else:
-                    contributions = {name: 0 for name in planned}
+        (flex_expenses_actual, flex_multiplier,
+         investment_contributions, contribution_shortfall) = _fund_from_income(
+            float(available_for_all), float(flex_expenses_full),
+            total_planned, float(max_flex_reduction)
+        )
 
+        if investment_contributions == total_planned:
+            # Everything planned was funded
+            contributions = planned.copy()
+        elif investment_contributions != 0:
+            # Partially funded: distribute proportionally across planned contributions
+            contributions = investment_contributions * (planned / total_planned)
         else:
-            # Not even enough income to cover core expenses + contributions.
-            # Reduce flex to minimum. Contribute what we can after that.
-            flex_expenses_actual = flex_expenses_full * (1 - max_flex_reduction)
-            flex_multiplier = 1 - max_flex_reduction if flex_expenses_full > 0 else 1.0
-
-            money_after_min_flex = (available_for_all
-                                    - flex_expenses_full * (1 - max_flex_reduction))
-
-            if money_after_min_flex > 0 and total_planned > 0:
-                # Some money left for partial contributions
-                for acc_name, amt in planned.items():
-                    share = amt / total_planned
-                    contributions[acc_name] = money_after_min_flex * share
-                investment_contributions = money_after_min_flex
-                contribution_shortfall = total_planned - investment_contributions
-            else:
-                # No money for contributions at all
-                contributions = {name: 0 for name in planned}
-                contribution_shortfall = total_planned
+            # No money for contributions at all
+            contributions = np.zeros(n_accounts)
 
         # --- FUND REMAINING CONTRIBUTIONS FROM PORTFOLIO ---
         # If income couldn't fully fund contributions (after reducing flex),
         # withdraw from accounts (by priority) to fund contributions to other accounts.
         # This enables strategic moves like: withdraw from taxable → contribute to Roth IRA
         
-        contribution_withdrawals = {acc.name: 0 for acc in accounts}
+        contribution_withdrawals = np.zeros(n_accounts)
         
         if contribution_shortfall > 0 and total_planned > 0:
             remaining_shortfall = contribution_shortfall
             
             # For each account that needs contributions (proportional to their shortfall)
-            for acc_name, planned_amt in planned.items():
+            for acc_idx in range(n_accounts):
+                planned_amt = planned[acc_idx]
                 if planned_amt == 0:
                     continue
                     
                 # How much does this account still need?
-                already_funded = contributions.get(acc_name, 0)
-                this_account_shortfall = planned_amt - already_funded
+                this_account_shortfall = planned_amt - contributions[acc_idx]
                 
                 if this_account_shortfall <= 0:
                     continue
                 
                 # Withdraw from other accounts (by priority) to fund this contribution
-                for source_acc in sorted_accounts:
+                for source_idx in withdrawal_order_list:
                     if this_account_shortfall <= 0:
                         break
                     
                     # Don't withdraw from an account to contribute to itself (circular)
-                    if source_acc.name == acc_name:
+                    if source_idx == acc_idx:
                         continue
                     
                     # How much can we withdraw from this source?
-                    available_in_source = account_balances[source_acc.name]
-                    withdrawal_amount = min(this_account_shortfall, available_in_source)
+                    withdrawal_amount = min(this_account_shortfall, balances[source_idx])
                     
                     if withdrawal_amount > 0:
                         # Record this as a contribution withdrawal (separate from deficit withdrawals)
-                        contribution_withdrawals[source_acc.name] += withdrawal_amount
-                        account_balances[source_acc.name] -= withdrawal_amount
+                        contribution_withdrawals[source_idx] += withdrawal_amount
+                        balances[source_idx] -= withdrawal_amount
                         
                         # Add to this account's contribution
-                        contributions[acc_name] = contributions.get(acc_name, 0) + withdrawal_amount
+                        contributions[acc_idx] += withdrawal_amount
                         investment_contributions += withdrawal_amount
                         this_account_shortfall -= withdrawal_amount
                         remaining_shortfall -= withdrawal_amount
@@ -464,8 +645,7 @@ def run_comprehensive_projection(
             contribution_shortfall = remaining_shortfall
 
         # Apply contributions to account balances
-        for acc_name, contrib in contributions.items():
-            account_balances[acc_name] += contrib
+        balances += contributions
 
         # --- REQUIRED MINIMUM DISTRIBUTIONS (RMDs) ---
         # RMDs are mandatory withdrawals from Traditional IRA and 401(k).
@@ -473,21 +653,18 @@ def run_comprehensive_projection(
         # These withdrawals count as income for tax purposes but we add them to available cash.
         # RMDs happen BEFORE regular deficit withdrawals.
         
-        rmds = {}
+        rmds = np.zeros(n_accounts)
         total_rmds = 0
         
-        for acc in accounts:
-            if acc.account_type in RMD_ACCOUNT_TYPES:
-                # Calculate RMD based on balance AFTER contributions
-                rmd_amount = calculate_rmd_amount(account_balances[acc.name], age, rmd_starting_age)
-                
-                # Apply the RMD (reduce account balance)
-                actual_rmd = min(rmd_amount, account_balances[acc.name])
-                account_balances[acc.name] -= actual_rmd
-                rmds[acc.name] = actual_rmd
-                total_rmds += actual_rmd
-            else:
-                rmds[acc.name] = 0
+        # Calculate RMD based on balance AFTER contributions. Before the RMD
+        # starting age the amount is 0, which still settles an overdrawn
+        # (negative) balance against available cash.
+        rmd_amounts = calculate_rmd_amount(balances, age, rmd_starting_age)
+        
+        # Apply the RMD (reduce account balance)
+        rmds = np.where(rmd_eligible, np.minimum(rmd_amounts, balances), 0.0)
+        balances -= rmds
+        total_rmds = float(rmds.sum())
 
         # --- TOTAL EXPENSES (for surplus/deficit calculation) ---
 
@@ -498,27 +675,24 @@ def run_comprehensive_projection(
         surplus_deficit = total_income + total_rmds - total_expenses_actual
 
         # --- WITHDRAWALS (Deficit Coverage) ---
+        # Drain accounts in priority order: each account covers whatever part
+        # of the deficit the higher-priority accounts before it couldn't.
+        # Once the deficit is covered the rest are left alone, even if a later
+        # overdrawn (negative) account would pull the running total back down.
 
-        withdrawals = {}
+        withdrawals = np.zeros(n_accounts)
         total_withdrawals = 0
 
         if surplus_deficit < 0:
-            deficit_to_cover = abs(surplus_deficit)
-
-            for acc in sorted_accounts:
-                if deficit_to_cover <= 0:
-                    withdrawals[acc.name] = 0
-                    continue
-
-                available = account_balances[acc.name]
-                withdrawal = min(deficit_to_cover, available)
-                withdrawals[acc.name] = withdrawal
-                account_balances[acc.name] -= withdrawal
-                total_withdrawals += withdrawal
-                deficit_to_cover -= withdrawal
-        else:
-            for acc in accounts:
-                withdrawals[acc.name] = 0
+            available = balances[withdrawal_order]
+            drawn_before = np.cumsum(available) - available
+            covered = np.maximum.accumulate(drawn_before) >= -surplus_deficit
+            withdrawals[withdrawal_order] = np.where(
+                covered, 0.0,
+                np.minimum(-surplus_deficit - drawn_before, available)
+            )
+            balances -= withdrawals
+            total_withdrawals = float(withdrawals.sum())
 
         # --- ONE-TIME EVENTS (Portfolio Transactions) ---
         # Apply events as direct additions/withdrawals to specific accounts
@@ -527,42 +701,37 @@ def run_comprehensive_projection(
         event_amount = 0
         event_description = ""
         event_account = ""
-        for event in events:
-            if event.year == year:
-                event_amount = event.amount
-                event_description = event.description
-                event_account = event.account_name
-                # Apply the event to the specified account
-                # Positive amount = withdrawal (reduces balance)
-                # Negative amount = addition (increases balance)
-                if event_account in account_balances:
-                    account_balances[event_account] -= event_amount
-                break
+        event = events_by_year.get(year)
+        if event is not None:
+            event_amount = event.amount
+            event_description = event.description
+            event_account = event.account_name
+            # Apply the event to the specified account
+            # Positive amount = withdrawal (reduces balance)
+            # Negative amount = addition (increases balance)
+            if event_account in account_index:
+                balances[account_index[event_account]] -= event_amount
 
         # --- INVESTMENT RETURNS ---
 
-        returns = {}
-        total_investment_returns = 0
-        for acc in accounts:
-            annual_return = account_balances[acc.name] * acc.annual_return
-            returns[acc.name] = annual_return
-            total_investment_returns += annual_return
-            account_balances[acc.name] += annual_return
+        returns = balances * account_returns
+        total_investment_returns = float(returns.sum())
+        balances += returns
 
         # --- PORTFOLIO STATUS ---
 
-        total_portfolio = sum(account_balances.values())
+        total_portfolio = float(balances.sum())
         portfolio_depleted = total_portfolio <= 0
         
         # --- CALCULATE WEIGHTED AVERAGE ROI FOR PROJECTIONS ---
         # Weighted average of account returns based on balance at start of year (before returns)
-        total_balance_before_returns = sum(account_balances[acc.name] - returns[acc.name] for acc in accounts)
+        balances_before_returns = balances - returns
+        total_balance_before_returns = float(balances_before_returns.sum())
         
         if total_balance_before_returns > 0:
-            weighted_roi = sum(
-                ((account_balances[acc.name] - returns[acc.name]) / total_balance_before_returns) * acc.annual_return
-                for acc in accounts
-            )
+            weighted_roi = float(np.sum(
+                (balances_before_returns / total_balance_before_returns) * account_returns
+            ))
         else:
             weighted_roi = 0
 
@@ -594,20 +763,54 @@ def run_comprehensive_projection(
         }
 
         # Add per-account detail columns
-        for acc in accounts:
-            year_data[f'{acc.name}_balance'] = account_balances[acc.name]
-            year_data[f'{acc.name}_contribution'] = contributions.get(acc.name, 0)
-            year_data[f'{acc.name}_withdrawal'] = withdrawals.get(acc.name, 0)
-            year_data[f'{acc.name}_contribution_withdrawal'] = contribution_withdrawals.get(acc.name, 0)
-            year_data[f'{acc.name}_rmd'] = rmds.get(acc.name, 0)
-            year_data[f'{acc.name}_return'] = returns.get(acc.name, 0)
+        if account_detail_columns:
+            detail_sources = {
+                'balance': balances.tolist(),
+                'contribution': contributions.tolist(),
+                'withdrawal': withdrawals.tolist(),
+                'contribution_withdrawal': contribution_withdrawals.tolist(),
+                'rmd': rmds.tolist(),
+                'return': returns.tolist(),
+            }
+            for column, source, acc_idx in account_detail_columns:
+                year_data[column] = detail_sources[source][acc_idx]
 
         results.append(year_data)
 
         if portfolio_depleted:
             break
 
-    return pd.DataFrame(results)
+    if return_format == 'dict':
+        return _rows_to_columns(results, wanted_columns)
+
+    df = pd.DataFrame(results)
+    if wanted_columns is not None:
+        df = df[[col for col in df.columns if col in wanted_columns]]
+    return df
+
+
+def _rows_to_columns(rows: List[Dict], wanted_columns: Optional[Collection[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Column-oriented {name: ndarray} view of a list of row dicts.
+
+    Columns appear in first-seen order, as pd.DataFrame(rows) would give them;
+    in numeric columns, None or missing values (e.g. historical rows) become NaN.
+    """
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    if wanted_columns is not None:
+        names = [name for name in names if name in wanted_columns]
+
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        column = np.array(values)
+        if column.dtype == object:
+            try:
+                column = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass  # Genuinely mixed values stay as objects
+        columns[name] = column
+    return columns
 
 
 def calculate_conservative_retirement_balance(
@@ -0,0 +1,120 @@
+"""
+Shared pytest fixtures.
+
+Provides a memoized wrapper around run_comprehensive_projection() for the
+property-based tests, where Hypothesis (and especially its shrinker) calls
+the projection repeatedly with the same arguments. Also warms up the
+optional numba kernels so compilation isn't charged to the first test,
+and registers the Hypothesis profiles (dev/ci/nightly, chosen with the
+HYPOTHESIS_PROFILE environment variable) plus parallel-run settings for
+pytest-xdist.
+
+Tests that share the SQLite database file are marked
+xdist_group("database") so that, with ``-n auto --dist loadgroup``, they
+all run on one worker while the pure calculation tests spread out.
+"""
+
+import functools
+import os
+from dataclasses import astuple
+
+import pytest
+from hypothesis import settings
+from hypothesis.database import DirectoryBasedExampleDatabase, InMemoryExampleDatabase
+
+from calculations import (
+    run_comprehensive_projection,
+    AccountBucket,
+    ExpenseCategory,
+    OneTimeEvent,
+    _fund_from_income,
+)
+
+
+# Compile the numba kernel (when numba is installed) once, before any test runs
+_fund_from_income(1.0, 1.0, 1.0, 0.5)
+
+
+def _ci_example_database():
+    """Keep CI's example database in RAM: tmpfs on Linux, else in-process memory."""
+    if os.path.isdir("/dev/shm"):
+        return DirectoryBasedExampleDatabase("/dev/shm/hypothesis")
+    return InMemoryExampleDatabase()
+
+
+# Hypothesis budgets, selected with HYPOTHESIS_PROFILE (default "dev"):
+# a quick local loop, the regular CI run, and a deep nightly exploration.
+settings.register_profile("dev", max_examples=20, deadline=500)
+settings.register_profile("ci", max_examples=100, deadline=2000, database=_ci_example_database())
+settings.register_profile("nightly", max_examples=500, deadline=None)
+_hypothesis_profile = os.getenv("HYPOTHESIS_PROFILE", "dev")
+
+# Under pytest-xdist, keep examples reproducible across workers and don't
+# have every worker contend for the shared on-disk example database.
+settings.register_profile(
+    "xdist", parent=settings.get_profile(_hypothesis_profile),
+    derandomize=True, database=None
+)
+settings.load_profile("xdist" if os.getenv("PYTEST_XDIST_WORKER") else _hypothesis_profile)
+
+
+def pytest_configure(config):
+    # Declared here too so the marker is known when pytest-xdist isn't installed
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): run all tests in the group on the same xdist worker"
+    )
+
+
+# Dataclass-list arguments and the types used to rebuild them from tuples
+_DATACLASS_ARGS = {
+    'accounts': AccountBucket,
+    'expense_categories': ExpenseCategory,
+    'events': OneTimeEvent,
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _projection_for_key(key):
+    """Run a projection from a hashable (name, value) argument tuple."""
+    kwargs = dict(key)
+    for arg, cls in _DATACLASS_ARGS.items():
+        if kwargs.get(arg) is not None:
+            kwargs[arg] = [cls(*values) for values in kwargs[arg]]
+    return run_comprehensive_projection(**kwargs)
+
+
+def _cached_projection(**kwargs):
+    """
+    Memoized run_comprehensive_projection() (keyword arguments only).
+
+    The projection is pure with respect to its inputs, so results are cached
+    on a hashable form of the arguments. Short runs (three years or less to
+    target_age) are cheap and are computed directly to keep them out of the
+    cache. Each call returns its own copy of the result.
+    """
+    if kwargs['target_age'] - kwargs['current_age'] <= 3:
+        return run_comprehensive_projection(**kwargs)
+
+    key = dict(kwargs)
+    for arg in _DATACLASS_ARGS:
+        if key.get(arg) is not None:
+            key[arg] = tuple(astuple(item) for item in key[arg])
+    key = tuple(sorted(key.items()))
+
+    try:
+        hash(key)
+    except TypeError:
+        # e.g. historical_summaries (list of dicts) - not worth caching
+        return run_comprehensive_projection(**kwargs)
+
+    result = _projection_for_key(key)
+    if isinstance(result, dict):  # return_format='dict'
+        return {name: column.copy() for name, column in result.items()}
+    return result.copy()
+
+
+@pytest.fixture(scope="session")
+def cached_projection():
+    """run_comprehensive_projection() memoized across Hypothesis examples."""
+    return _cached_projection
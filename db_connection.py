@@ -19,12 +19,46 @@ For local development:
 - Uses SQLite by default (no configuration needed)
 """
 
+import itertools
 import os
-from typing import Optional, Any, List, Tuple
-from contextlib import contextmanager
+import threading
+from typing import Optional, Any, Callable, Dict, Iterator, List, Tuple
+from contextlib import contextmanager, nullcontext
 import streamlit as st
 
 
+# Settings applied to every new SQLite connection (they don't persist in the
+# database file). journal_mode=WAL does persist and is set by enable_wal().
+SQLITE_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",   # Safe with WAL; no fsync on every commit
+    "PRAGMA busy_timeout=5000",    # Wait up to 5 s for another writer's lock
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",    # 64 MB page cache
+    "PRAGMA mmap_size=268435456",  # Read through a 256 MB memory map
+)
+
+
+# Prepared statements kept per SQLite connection (Python's default is 128;
+# pinned so the app's fixed set of queries never gets evicted). Callers keep
+# their SQL in module-level _SQL_* constants so repeated calls send identical
+# text and hit this cache.
+SQLITE_STATEMENT_CACHE_SIZE = 128
+
+# Largest chunk insert_rows() puts in one statement (a power of two; wide
+# tables get smaller chunks so they stay within the bound-parameter limit)
+MAX_INSERT_ROWS = 256
+
+# Bound parameters allowed in one statement: SQLite builds before 3.32 allow
+# only 999, later ones 32766; PostgreSQL allows 65535
+SQLITE_LEGACY_MAX_VARIABLES = 999
+SQLITE_MAX_VARIABLES = 32766
+POSTGRES_MAX_PARAMETERS = 65535
+
+
+# Unique names for PostgreSQL server-side cursors
+_cursor_ids = itertools.count()
+
+
 class DatabaseConnection:
     """Abstract database connection that works with both SQLite and PostgreSQL."""
     
@@ -39,6 +73,13 @@ class DatabaseConnection:
         else:
             import sqlite3
             self.db_module = sqlite3
+        
+        # SQLite keeps one long-lived connection (opened on first use) so its
+        # page cache stays warm; calls on it are serialized by the lock.
+        self._sqlite_conn = None
+        self._lock = threading.RLock()
+        # Connection of the transaction open in the current thread, if any
+        self._local = threading.local()
     
     def _detect_database_type(self) -> str:
         """Detect which database to use based on environment."""
@@ -96,22 +137,102 @@ class DatabaseConnection:
         # SQLite default (overridable for containerized deployments)
         return {'database': os.getenv('SQLITE_DB_PATH', 'user_data.db')}
     
+    def _connect(self):
+        """
+        Return a connection: a new one for PostgreSQL, the shared one for SQLite.
+        
+        The shared SQLite connection is created on first use with the
+        per-connection settings applied.
+        """
+        if self.db_type == 'postgresql':
+            return self.db_module.connect(**self.connection_params)
+        
+        if self._sqlite_conn is None:
+            conn = self.db_module.connect(self.connection_params['database'],
+                                          check_same_thread=False,
+                                          cached_statements=SQLITE_STATEMENT_CACHE_SIZE)
+            for pragma in SQLITE_CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._sqlite_conn = conn
+        return self._sqlite_conn
+    
     @contextmanager
     def get_connection(self):
-        """Get a database connection (context manager)."""
-        if self.db_type == 'postgresql':
-            conn = self.db_module.connect(**self.connection_params)
-        else:
-            conn = self.db_module.connect(self.connection_params['database'])
+        """
+        Get a database connection (context manager).
         
-        try:
+        Commits on success and rolls back on error. SQLite reuses the shared
+        connection, held under the lock for the duration; PostgreSQL
+        connections are closed afterwards.
+        
+        Nested uses in the same thread share the outermost connection and
+        transaction, which commits (or rolls back) once at the end.
+        """
+        outer_conn = getattr(self._local, 'conn', None)
+        if outer_conn is not None:
+            yield outer_conn
+            return
+        
+        with self._lock if self.db_type == 'sqlite' else nullcontext():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.rollback_callbacks = []
+            
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                for callback in self._local.rollback_callbacks:
+                    callback()
+                raise
+            finally:
+                self._local.conn = None
+                self._local.rollback_callbacks = []
+                if self.db_type == 'postgresql':
+                    conn.close()
+    
+    @property
+    def in_transaction(self) -> bool:
+        """Whether the current thread is inside get_connection()/transaction()."""
+        return getattr(self._local, 'conn', None) is not None
+    
+    def on_rollback(self, callback: Callable[[], None]):
+        """
+        Call callback if the current thread's enclosing transaction rolls back.
+        
+        Lets callers drop state derived from data that was never committed.
+        Outside get_connection()/transaction() there is nothing to roll back,
+        so the callback is ignored.
+        """
+        if self.in_transaction:
+            self._local.rollback_callbacks.append(callback)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run several execute_* calls as one transaction (context manager).
+        
+        On SQLite the outermost transaction starts with BEGIN IMMEDIATE, so
+        reads inside it (e.g. before a DELETE) are part of the transaction
+        and the write lock is taken up front rather than upgraded mid-way.
+        
+        Example:
+            with db.transaction():
+                db.execute_update("DELETE ...", params)
+                db.execute_many("INSERT ...", rows)
+        """
+        with self.get_connection() as conn:
+            if self.db_type == 'sqlite' and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+    
+    def close(self):
+        """Close the shared SQLite connection (reopened on next use)."""
+        with self._lock:
+            if self._sqlite_conn is not None:
+                self._sqlite_conn.close()
+                self._sqlite_conn = None
     
     def execute_query(self, query: str, params: Optional[Tuple] = None) -> List[Tuple]:
         """
@@ -136,6 +257,74 @@ class DatabaseConnection:
                 cursor.execute(query)
             return cursor.fetchall()
     
+    def execute_query_dicts(self, query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a SELECT query and return each row as a dict keyed by column name.
+        
+        Alias columns in the SELECT (``col AS key``) to choose the dict keys.
+        SQLite builds the rows with its C-level sqlite3.Row factory.
+        
+        Args:
+            query: SQL query with placeholders
+            params: Query parameters
+            
+        Returns:
+            List of dicts mapping column names to values
+        """
+        return list(self.iter_query_dicts(query, params, server_side=False))
+    
+    def iter_query_dicts(self, query: str, params: Optional[Tuple] = None,
+                         server_side: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a SELECT query and yield rows as dicts.
+        
+        On PostgreSQL a server-side (named) cursor streams the rows in
+        batches unless server_side is False, so callers can stop early. It
+        runs on a connection of its own (or the enclosing transaction's), so
+        a generator left open doesn't pull this thread's later calls into
+        its transaction. SQLite reads the rows up front and releases the
+        shared connection and its lock before the first row is yielded.
+        """
+        if self.db_type == 'postgresql':
+            query = self._convert_placeholders(query)
+        
+        if self.db_type == 'sqlite' or not server_side:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                if self.db_type == 'sqlite':
+                    cursor.row_factory = self.db_module.Row
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                rows = cursor.fetchall()
+                columns = [col[0] for col in cursor.description]
+            if self.db_type == 'sqlite':
+                for row in rows:
+                    yield dict(row)
+            else:
+                for row in rows:
+                    yield dict(zip(columns, row))
+            return
+        
+        outer_conn = getattr(self._local, 'conn', None)
+        conn = outer_conn if outer_conn is not None else self._connect()
+        try:
+            cursor = conn.cursor(name=f"iter_query_{next(_cursor_ids)}")
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            columns = None
+            for row in cursor:
+                # A named cursor only describes its columns after the first fetch
+                if columns is None:
+                    columns = [col[0] for col in cursor.description]
+                yield dict(zip(columns, row))
+        finally:
+            if outer_conn is None:
+                conn.close()
+    
     def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
         """
         Execute an INSERT, UPDATE, or DELETE query.
@@ -159,6 +348,31 @@ class DatabaseConnection:
                 cursor.execute(query)
             return cursor.rowcount
     
+    def execute_insert(self, query: str, params: Optional[Tuple] = None) -> int:
+        """
+        Execute a single-row INSERT and return the new row's id.
+        
+        PostgreSQL appends ``RETURNING id``; SQLite reads cursor.lastrowid,
+        which needs no RETURNING support (SQLite 3.35+).
+        
+        Args:
+            query: INSERT query with placeholders (no RETURNING clause)
+            params: Query parameters
+            
+        Returns:
+            The id of the inserted row
+        """
+        if self.db_type == 'postgresql':
+            query = self._convert_placeholders(query).rstrip() + " RETURNING id"
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return self.get_last_insert_id(cursor)
+    
     def execute_many(self, query: str, params_list: List[Tuple]) -> int:
         """
         Execute the same query multiple times with different parameters.
@@ -179,6 +393,48 @@ class DatabaseConnection:
             cursor.executemany(query, params_list)
             return cursor.rowcount
     
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[Tuple]) -> int:
+        """
+        Insert rows with multi-row ``INSERT ... VALUES (...), (...)`` statements.
+        
+        One statement carries many rows, instead of stepping one statement
+        per row as execute_many does. Rows go in chunks whose sizes are
+        powers of two (at most MAX_INSERT_ROWS, and few enough that their
+        values fit the bound-parameter limit), so each table only ever
+        produces a handful of distinct statements for the statement cache.
+        All chunks run in one transaction.
+        
+        Args:
+            table_name: Table to insert into
+            columns: Column names, in the order of each row's values
+            rows: List of value tuples
+            
+        Returns:
+            Number of rows inserted
+        """
+        row_placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+        prefix = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES "
+        max_rows = max(1, min(MAX_INSERT_ROWS, self._max_parameters() // len(columns)))
+        max_rows = 1 << (max_rows.bit_length() - 1)
+        
+        with self.transaction():
+            start = 0
+            while start < len(rows):
+                size = min(max_rows, 1 << ((len(rows) - start).bit_length() - 1))
+                chunk = rows[start:start + size]
+                self.execute_update(prefix + ", ".join([row_placeholders] * size),
+                                    tuple(value for row in chunk for value in row))
+                start += size
+        return len(rows)
+    
+    def _max_parameters(self) -> int:
+        """Bound parameters one statement may carry (999 unless known higher)."""
+        if self.db_type == 'postgresql':
+            return POSTGRES_MAX_PARAMETERS
+        if self.db_module.sqlite_version_info >= (3, 32, 0):
+            return SQLITE_MAX_VARIABLES
+        return SQLITE_LEGACY_MAX_VARIABLES
+    
     def _convert_placeholders(self, query: str) -> str:
         """Convert SQLite placeholders (?) to PostgreSQL placeholders (%s)."""
         return query.replace('?', '%s')
@@ -239,6 +495,44 @@ class DatabaseConnection:
             columns = [row[1] for row in result]
             return column_name in columns
     
+    def index_exists(self, index_name: str) -> bool:
+        """Check if an index exists."""
+        if self.db_type == 'postgresql':
+            query = """
+                SELECT EXISTS (
+                    SELECT FROM pg_indexes
+                    WHERE schemaname = 'public'
+                    AND indexname = %s
+                )
+            """
+            result = self.execute_query(query, (index_name,))
+            return result[0][0] if result else False
+        else:
+            query = "SELECT name FROM sqlite_master WHERE type='index' AND name=?"
+            result = self.execute_query(query, (index_name,))
+            return len(result) > 0
+    
+    def create_index_if_not_exists(self, index_name: str, table_name: str,
+                                   columns: str, unique: bool = False) -> bool:
+        """
+        Create an index if it doesn't exist.
+        
+        Args:
+            index_name: Name of the index
+            table_name: Table to index
+            columns: Comma-separated column list, e.g. "username, priority"
+            unique: Create a UNIQUE index
+            
+        Returns:
+            True if the index was created by this call
+        """
+        if self.index_exists(index_name):
+            return False
+        
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        self.execute_update(f"CREATE {kind} IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+        return True
+    
     def add_column_if_not_exists(self, table_name: str, column_name: str, 
                                   column_type: str, default_value: Any = None):
         """Add a column to a table if it doesn't exist."""
@@ -256,6 +550,41 @@ class DatabaseConnection:
         
         self.execute_update(query)
     
+    def enable_wal(self):
+        """
+        Switch SQLite to write-ahead logging (no-op on PostgreSQL).
+        
+        WAL lets readers proceed during a write and turns each commit into an
+        append to the log. The mode is stored in the database file, so this
+        only needs to run once per database.
+        """
+        if self.db_type == 'sqlite':
+            self.execute_query("PRAGMA journal_mode=WAL")
+    
+    def get_schema_version(self) -> int:
+        """
+        Return the schema version recorded in the database (0 if never set).
+        
+        SQLite keeps it in PRAGMA user_version; PostgreSQL in a one-row
+        schema_version table.
+        """
+        if self.db_type == 'postgresql':
+            self.create_table_if_not_exists('schema_version', "version INTEGER NOT NULL")
+            rows = self.execute_query("SELECT version FROM schema_version")
+            return rows[0][0] if rows else 0
+        
+        return self.execute_query("PRAGMA user_version")[0][0]
+    
+    def set_schema_version(self, version: int):
+        """Record the schema version in the database."""
+        if self.db_type == 'postgresql':
+            with self.transaction():
+                self.execute_update("DELETE FROM schema_version")
+                self.execute_update("INSERT INTO schema_version (version) VALUES (?)", (version,))
+        else:
+            # PRAGMA values can't be bound as parameters
+            self.execute_update(f"PRAGMA user_version = {int(version)}")
+    
     def get_last_insert_id(self, cursor) -> int:
         """Get the ID of the last inserted row."""
         if self.db_type == 'postgresql':
@@ -10,6 +10,11 @@ import hashlib
 from auth_db import AuthManager
 
 
+# All tests in this module share the SQLite database file, so keep them on
+# one worker when running in parallel (pytest -n auto --dist loadgroup)
+pytestmark = pytest.mark.xdist_group(name="database")
+
+
 class TestAuthManager:
     """Test authentication manager functionality"""
 
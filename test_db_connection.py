@@ -10,6 +10,11 @@ import os
 from db_connection import DatabaseConnection, get_db
 
 
+# All tests in this module share the SQLite database file, so keep them on
+# one worker when running in parallel (pytest -n auto --dist loadgroup)
+pytestmark = pytest.mark.xdist_group(name="database")
+
+
 class TestDatabaseConnection:
     """Test database connection and abstraction"""
 
@@ -19,7 +24,7 @@ class TestDatabaseConnection:
         # Will use SQLite by default in test environment
         db = DatabaseConnection()
         yield db
-        # Cleanup handled by SQLite
+        db.close()
 
     def test_sqlite_detection(self, db):
         """Should use SQLite when no postgres config"""
@@ -54,6 +59,26 @@ class TestDatabaseConnection:
         # Cleanup
         db.execute_update("DROP TABLE IF EXISTS test_query")
 
+    def test_execute_query_dicts(self, db):
+        """Should return rows as dicts keyed by (aliased) column name"""
+        db.execute_update("""
+            CREATE TABLE IF NOT EXISTS test_query_dicts (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                value INTEGER
+            )
+        """)
+        db.execute_update("INSERT INTO test_query_dicts (name, value) VALUES (?, ?)", ('test1', 100))
+
+        results = db.execute_query_dicts(
+            "SELECT name, value AS amount FROM test_query_dicts WHERE value > ?", (50,))
+
+        assert results == [{'name': 'test1', 'amount': 100}]
+        # Plain queries on the shared connection still return tuples
+        assert db.execute_query("SELECT name FROM test_query_dicts") == [('test1',)]
+
+        db.execute_update("DROP TABLE IF EXISTS test_query_dicts")
+
     def test_execute_update(self, db):
         """Should execute INSERT/UPDATE/DELETE"""
         # Create table
@@ -114,6 +139,34 @@ class TestDatabaseConnection:
         # Cleanup
         db.execute_update("DROP TABLE IF EXISTS test_many")
 
+    def test_sqlite_wal_and_connection_pragmas(self, db):
+        """SQLite connections should run in WAL mode with relaxed syncing"""
+        if db.db_type != 'sqlite':
+            pytest.skip("SQLite-specific settings")
+
+        db.enable_wal()
+
+        assert db.execute_query("PRAGMA journal_mode")[0][0] == 'wal'
+        assert db.execute_query("PRAGMA synchronous")[0][0] == 1  # NORMAL
+        assert db.execute_query("PRAGMA temp_store")[0][0] == 2  # MEMORY
+        assert db.execute_query("PRAGMA busy_timeout")[0][0] == 5000
+
+    def test_sqlite_connection_is_reused(self, db):
+        """SQLite calls should share one connection until close()"""
+        if db.db_type != 'sqlite':
+            pytest.skip("SQLite-specific connection handling")
+
+        with db.get_connection() as conn1:
+            pass
+        with db.get_connection() as conn2:
+            pass
+        assert conn1 is conn2
+
+        db.close()
+        with db.get_connection() as conn3:
+            assert conn3.execute("SELECT 1").fetchone() == (1,)
+        assert conn3 is not conn1
+
     def test_table_exists_check(self, db):
         """Should correctly identify existing tables"""
         # Table doesn't exist yet
@@ -251,6 +304,95 @@ class TestDatabaseConnection:
         # Cleanup
         db.execute_update(f"DROP TABLE IF EXISTS {table_name}")
 
+    def test_insert_rows_in_chunks(self, db, monkeypatch):
+        """insert_rows should insert every row across power-of-two chunks"""
+        import db_connection
+        monkeypatch.setattr(db_connection, 'MAX_INSERT_ROWS', 4)
+        table_name = 'test_insert_rows'
+        db.create_table_if_not_exists(table_name, """
+            id INTEGER PRIMARY KEY,
+            label TEXT NOT NULL,
+            value INTEGER NOT NULL
+        """)
+
+        rows = [(f'row{i}', i) for i in range(11)]  # Chunks of 4, 4, 2, 1
+        assert db.insert_rows(table_name, ('label', 'value'), rows) == 11
+        assert db.insert_rows(table_name, ('label', 'value'), []) == 0
+
+        stored = db.execute_query(f"SELECT label, value FROM {table_name} ORDER BY id")
+        assert [tuple(row) for row in stored] == rows
+
+        db.execute_update(f"DROP TABLE IF EXISTS {table_name}")
+
+    def test_insert_rows_fits_legacy_parameter_limit(self, tmp_path, monkeypatch):
+        """Wide rows should be chunked under the 999 parameters of older SQLite"""
+        monkeypatch.setenv('SQLITE_DB_PATH', str(tmp_path / 'wide.db'))
+        db = DatabaseConnection()
+        if db.db_type != 'sqlite':
+            pytest.skip("SQLite parameter limit")
+        monkeypatch.setattr(db.db_module, 'sqlite_version_info', (3, 31, 1))
+        table_name = 'test_insert_wide'
+        columns = ('a', 'b', 'c', 'd', 'e')
+        db.create_table_if_not_exists(table_name, """
+            id INTEGER PRIMARY KEY,
+            a INTEGER, b INTEGER, c INTEGER, d INTEGER, e INTEGER
+        """)
+
+        params_per_statement = []
+        original_execute_update = db.execute_update
+        monkeypatch.setattr(db, 'execute_update', lambda query, params=None: (
+            params_per_statement.append(len(params or ()))
+            or original_execute_update(query, params)))
+
+        rows = [tuple(range(i, i + 5)) for i in range(300)]
+        try:
+            assert db.insert_rows(table_name, columns, rows) == 300
+            # 999 // 5 = 199 rows, rounded down to a power of two
+            assert max(params_per_statement) == 128 * 5
+            assert db.execute_query(f"SELECT COUNT(*) FROM {table_name}")[0][0] == 300
+        finally:
+            db.close()
+
+    def test_transaction_groups_calls(self, db):
+        """Calls inside transaction() should commit or roll back together"""
+        table_name = 'test_grouped'
+
+        db.create_table_if_not_exists(table_name, """
+            id INTEGER PRIMARY KEY,
+            value INTEGER NOT NULL
+        """)
+
+        with db.transaction() as conn:
+            if db.db_type == 'sqlite':
+                # Opened explicitly, before the first write
+                assert conn.in_transaction
+            db.execute_update(f"INSERT INTO {table_name} (value) VALUES (?)", (1,))
+            db.execute_many(f"INSERT INTO {table_name} (value) VALUES (?)", [(2,), (3,)])
+        assert db.execute_query(f"SELECT COUNT(*) FROM {table_name}")[0][0] == 3
+
+        with pytest.raises(Exception):
+            with db.transaction():
+                db.execute_update(f"DELETE FROM {table_name}")
+                db.execute_update(f"INSERT INTO {table_name} (value) VALUES (NULL)")
+
+        # The DELETE was rolled back along with the failed INSERT
+        assert db.execute_query(f"SELECT COUNT(*) FROM {table_name}")[0][0] == 3
+
+        # Rollback callbacks run only for the transaction that rolls back
+        rolled_back = []
+        db.on_rollback(lambda: rolled_back.append('outside'))
+        with db.transaction():
+            db.on_rollback(lambda: rolled_back.append('committed'))
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                with db.get_connection():
+                    db.on_rollback(lambda: rolled_back.append('nested'))
+                raise RuntimeError("abort")
+        assert rolled_back == ['nested']
+
+        # Cleanup
+        db.execute_update(f"DROP TABLE IF EXISTS {table_name}")
+
 
 class TestDatabasePlaceholderConversion:
     """Test SQL placeholder conversion between SQLite and PostgreSQL"""
@@ -322,6 +464,13 @@ class TestDatabaseSchemaHandling:
         # Should create successfully regardless of database type
         assert db.table_exists(table_name) is True
 
+        # execute_insert hands back each new row's id
+        first_id = db.execute_insert(f"INSERT INTO {table_name} (data) VALUES (?)", ('a',))
+        second_id = db.execute_insert(f"INSERT INTO {table_name} (data) VALUES (?)", ('b',))
+        assert second_id > first_id
+        assert db.execute_query(
+            f"SELECT data FROM {table_name} WHERE id = ?", (second_id,))[0][0] == 'b'
+
         # Cleanup
         db.execute_update(f"DROP TABLE IF EXISTS {table_name}")
 
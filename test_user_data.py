@@ -6,12 +6,21 @@ and integration with the database abstraction layer.
 """
 
 import pytest
+import numpy as np
 import tempfile
 import os
-from user_data import UserDataManager
+import threading
+from db_connection import DatabaseConnection
+import user_data
+from user_data import UserDataManager, SCHEMA_VERSION, get_user_data_manager
 from calculations import AccountBucket, ExpenseCategory, OneTimeEvent
 
 
+# All tests in this module share the SQLite database file, so keep them on
+# one worker when running in parallel (pytest -n auto --dist loadgroup)
+pytestmark = pytest.mark.xdist_group(name="database")
+
+
 class TestUserDataManager:
     """Test UserDataManager CRUD operations"""
 
@@ -316,6 +325,72 @@ class TestUserDataManager:
         assert accounts_loaded_a[0]['name'] == '401k_A'
         assert accounts_loaded_b[0]['name'] == '401k_B'
 
+    def test_lookup_indexes_created(self, manager):
+        """Per-user lookup columns should be indexed"""
+        for index_name in ['idx_accounts_user', 'idx_expenses_user',
+                           'idx_events_user', 'idx_snapshots_user_account']:
+            assert manager.db.index_exists(index_name)
+
+    def test_snapshot_reads_use_covering_index(self, manager):
+        """Snapshot loads should be answered from the index alone"""
+        if manager.db.db_type != 'sqlite':
+            pytest.skip("Reads the SQLite query plan")
+
+        for sql in [user_data._SQL_LOAD_SNAPSHOTS, user_data._SQL_LATEST_SNAPSHOT_VALUE]:
+            plan = manager.db.execute_query("EXPLAIN QUERY PLAN " + sql, ('u', 'a'))
+            assert any('COVERING INDEX idx_snapshots_user_account' in row[-1] for row in plan)
+
+    def test_schema_version_is_current(self, manager):
+        """init_database should leave the schema at the latest version"""
+        assert manager.db.get_schema_version() == SCHEMA_VERSION
+
+    def test_schema_checked_once_per_connection(self, manager, monkeypatch):
+        """Later managers on the same connection should skip init_database"""
+        def fail():
+            raise AssertionError("schema checked again")
+        monkeypatch.setattr(manager.db, 'get_schema_version', fail)
+
+        assert UserDataManager().db is manager.db
+
+    def test_global_manager_is_shared(self):
+        """get_user_data_manager should hand out one shared instance"""
+        assert get_user_data_manager() is get_user_data_manager()
+
+    def test_migrations_upgrade_legacy_database(self, tmp_path, monkeypatch):
+        """An unversioned database from an older release should be migrated"""
+        monkeypatch.setenv('SQLITE_DB_PATH', str(tmp_path / 'legacy.db'))
+        db = DatabaseConnection()
+        if db.db_type != 'sqlite':
+            pytest.skip("Builds a SQLite database file")
+
+        # Original accounts layout, with a duplicated account name
+        db.create_table_if_not_exists('user_accounts', """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            name TEXT NOT NULL,
+            balance REAL NOT NULL,
+            annual_return REAL NOT NULL,
+            contrib_share REAL NOT NULL,
+            priority INTEGER NOT NULL
+        """)
+        db.execute_many("""
+            INSERT INTO user_accounts
+            (username, name, balance, annual_return, contrib_share, priority)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [('legacy', 'IRA', 1000, 0.05, 0, 1), ('legacy', 'IRA', 2000, 0.05, 0, 2)])
+
+        monkeypatch.setattr('user_data.get_db', lambda: db)
+        manager = UserDataManager()
+
+        assert db.get_schema_version() == SCHEMA_VERSION
+        assert db.column_exists('user_accounts', 'planned_contribution')
+        assert db.index_exists('idx_accounts_user_name')
+        loaded = manager.load_user_accounts('legacy')
+        assert [(acc['name'], acc['balance']) for acc in loaded] == [
+            ('IRA', 1000), ('IRA (2)', 2000)
+        ]
+        db.close()
+
     def test_default_data_creation(self, manager, test_username):
         """Should create sensible defaults for new users"""
         # Try to load profile for non-existent user
@@ -329,6 +404,191 @@ class TestUserDataManager:
             assert 'target_age' in profile
             assert profile['target_age'] > profile['current_age']
 
+    def test_default_data_is_all_or_nothing(self, manager, test_username, monkeypatch):
+        """A failure while provisioning defaults should leave no partial user"""
+        def fail(*args):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(manager, 'save_user_events', fail)
+
+        with pytest.raises(RuntimeError):
+            manager.create_default_data_for_user(test_username)
+
+        assert not manager.user_exists(test_username)
+        assert manager.load_user_accounts(test_username) == []
+
+        monkeypatch.undo()
+        manager.create_default_data_for_user(test_username)
+        assert manager.user_exists(test_username)
+        assert len(manager.load_user_expenses(test_username)) == 6
+
+    def test_batch_commits_or_rolls_back_together(self, manager, test_username):
+        """Writes inside batch() should land together or not at all"""
+        with pytest.raises(RuntimeError):
+            with manager.batch():
+                manager.save_snapshot(test_username, '401k', '2024-01-01', 0, 100)
+                raise RuntimeError("abort import")
+        assert manager.load_snapshots(test_username, '401k') == []
+
+        with manager.batch():
+            for month in range(1, 13):
+                manager.save_snapshot(test_username, '401k', f'2024-{month:02d}-01', 0, month)
+        assert len(manager.load_snapshots(test_username, '401k')) == 12
+
+    def test_save_snapshots_bulk(self, manager, test_username):
+        """save_snapshots should insert every row and refresh cached lists"""
+        assert manager.load_snapshots(test_username, '401k') == []
+
+        manager.save_snapshots(test_username, [
+            ('401k', '2024-01-01', 0, 100),
+            ('401k', '2024-02-01', 50, 160),
+            ('Roth IRA', '2024-01-01', 0, 40),
+        ])
+
+        assert [s['total_value'] for s in manager.load_snapshots(test_username, '401k')] == [100, 160]
+        assert len(manager.load_snapshots(test_username, 'Roth IRA')) == 1
+        manager.save_snapshots(test_username, [])
+
+    def test_default_data_is_read_only(self):
+        """The shared new-user defaults can't be changed by callers"""
+        with pytest.raises(TypeError):
+            user_data.DEFAULT_PROFILE['current_age'] = 30
+        with pytest.raises(TypeError):
+            user_data.DEFAULT_ACCOUNTS[0]['balance'] = 0
+
+    def test_load_user_bundle(self, manager, test_username):
+        """The bundle should match the individual loaders"""
+        manager.create_default_data_for_user(test_username)
+
+        bundle = manager.load_user_bundle(test_username)
+
+        manager.clear_cache()
+        assert bundle == {
+            'profile': manager.load_user_profile(test_username),
+            'accounts': manager.load_user_accounts(test_username),
+            'expenses': manager.load_user_expenses(test_username),
+            'events': manager.load_user_events(test_username),
+        }
+        assert manager.load_user_bundle('nonexistent_user_12345')['profile'] is None
+
+    def test_load_cache_invalidated_on_save(self, manager, test_username):
+        """Repeat loads come from the cache until the data is saved again"""
+        manager.create_default_data_for_user(test_username)
+
+        accounts = manager.load_user_accounts(test_username)
+        accounts[0]['balance'] = -1  # Callers get copies, not the cached rows
+        assert manager.load_user_accounts(test_username)[0]['balance'] == 2000
+
+        # A write behind the manager's back is not seen until clear_cache()
+        manager.load_user_expenses(test_username)
+        manager.db.execute_update(
+            "UPDATE user_expenses SET amount = ? WHERE username = ?", (1, test_username))
+        assert manager.load_user_expenses(test_username)[0]['amount'] != 1
+        manager.clear_cache()
+        assert manager.load_user_expenses(test_username)[0]['amount'] == 1
+
+        manager.save_user_accounts(test_username, accounts)
+        assert manager.load_user_accounts(test_username)[0]['balance'] == -1
+
+        profile = manager.load_user_profile(test_username)
+        manager.save_user_profile(test_username, {**profile, 'current_age': 50})
+        assert manager.load_user_profile(test_username)['current_age'] == 50
+
+    def test_unchanged_save_is_skipped(self, manager, test_username, monkeypatch):
+        """Saving the same data twice should only write once"""
+        expenses = [{'name': 'Food', 'amount': 6000, 'type': 'CORE'}]
+        manager.save_user_expenses(test_username, expenses)
+
+        writes = []
+        original_insert_rows = manager.db.insert_rows
+        monkeypatch.setattr(manager.db, 'insert_rows',
+                            lambda *args: writes.append(args) or original_insert_rows(*args))
+
+        manager.save_user_expenses(test_username, expenses)
+        assert writes == []
+
+        manager.save_user_expenses(test_username, [{**expenses[0], 'amount': 6500}])
+        assert len(writes) == 1
+        assert manager.load_user_expenses(test_username)[0]['amount'] == 6500
+
+    def test_account_save_writes_only_changed_rows(self, manager, test_username, monkeypatch):
+        """After an unchanged save is skipped, a changed save still writes"""
+        accounts = [
+            {'name': 'A', 'balance': 1000, 'return': 0.07, 'priority': 1},
+            {'name': 'B', 'balance': 2000, 'return': 0.07, 'priority': 2},
+        ]
+        manager.save_user_accounts(test_username, accounts)
+
+        writes = []
+        original_execute_many = manager.db.execute_many
+        monkeypatch.setattr(manager.db, 'execute_many',
+                            lambda query, rows: writes.append(rows) or original_execute_many(query, rows))
+
+        manager.save_user_accounts(test_username, accounts)
+        assert writes == []
+
+        manager.save_user_accounts(test_username, [accounts[0], {**accounts[1], 'balance': 2500}])
+        assert [[row[1] for row in rows] for rows in writes] == [['B']]
+        loaded = manager.load_user_accounts(test_username)
+        assert [(acc['name'], acc['balance']) for acc in loaded] == [('A', 1000), ('B', 2500)]
+
+    def test_save_after_outside_write_is_not_skipped(self, manager, test_username):
+        """A save is only skipped if the database already holds the same rows"""
+        expenses = [{'name': 'Food', 'amount': 6000, 'type': 'CORE'}]
+        profile = {'current_age': 40, 'target_age': 90, 'work_end_age': 65}
+        manager.save_user_expenses(test_username, expenses)
+        manager.save_user_profile(test_username, profile)
+
+        # Another process (or manager) writes in between
+        manager.db.execute_update(
+            "UPDATE user_expenses SET amount = ? WHERE username = ?", (1, test_username))
+        manager.db.execute_update(
+            "UPDATE user_profiles SET current_age = ? WHERE username = ?", (41, test_username))
+
+        manager.save_user_expenses(test_username, expenses)
+        manager.save_user_profile(test_username, profile)
+        assert manager.db.execute_query(
+            "SELECT amount FROM user_expenses WHERE username = ?", (test_username,)) == [(6000,)]
+        assert manager.db.execute_query(
+            "SELECT current_age FROM user_profiles WHERE username = ?", (test_username,)) == [(40,)]
+
+    def test_save_inside_rolled_back_transaction_is_not_skipped(self, manager, test_username):
+        """A save undone by a rollback must be written again next time"""
+        expenses = [{'name': 'Food', 'amount': 6000, 'type': 'CORE'}]
+        with pytest.raises(RuntimeError):
+            with manager.batch():
+                manager.save_user_expenses(test_username, expenses)
+                raise RuntimeError("abort")
+
+        manager.save_user_expenses(test_username, expenses)
+        assert len(manager.load_user_expenses(test_username)) == 1
+
+    def test_load_inside_rolled_back_transaction_is_not_cached(self, manager, test_username):
+        """Rows loaded before a rollback must not be served from the cache"""
+        with pytest.raises(RuntimeError):
+            with manager.batch():
+                manager.save_user_expenses(
+                    test_username, [{'name': 'Food', 'amount': 6000, 'type': 'CORE'}])
+                assert len(manager.load_user_expenses(test_username)) == 1
+                raise RuntimeError("abort")
+
+        assert manager.load_user_expenses(test_username) == []
+
+    def test_snapshot_cache_invalidated_on_change(self, manager, test_username):
+        """Cached snapshot lists should follow saves, deletes and renames"""
+        manager.save_snapshot(test_username, '401k', '2024-01-01', 0, 100)
+        assert len(manager.load_snapshots(test_username, '401k')) == 1
+
+        snap_id = manager.save_snapshot(test_username, '401k', '2024-02-01', 0, 110)
+        assert len(manager.load_snapshots(test_username, '401k')) == 2
+
+        manager.delete_snapshot(test_username, snap_id)
+        assert len(manager.load_snapshots(test_username, '401k')) == 1
+
+        assert manager.load_snapshots(test_username, 'Retirement') == []
+        manager.rename_account_snapshots(test_username, '401k', 'Retirement')
+        assert manager.load_snapshots(test_username, '401k') == []
+        assert len(manager.load_snapshots(test_username, 'Retirement')) == 1
+
     def test_snapshot_save_and_retrieve(self, manager, test_username):
         """Should save and query account snapshots"""
         # Create profile
@@ -353,7 +613,7 @@ class TestUserDataManager:
         manager.save_snapshot(test_username, '401k', '2024-12-31', 10000, 135000)
 
         manager.save_snapshot(test_username, 'Roth IRA', '2024-01-01', 0, 50000)
-        manager.save_snapshot(test_username, 'Roth IRA', '2024-12-31', 7000, 61000)
+        roth_id = manager.save_snapshot(test_username, 'Roth IRA', '2024-12-31', 7000, 61000)
 
         # Retrieve snapshots
         snapshots_401k = manager.load_snapshots(test_username, '401k')
@@ -366,6 +626,39 @@ class TestUserDataManager:
         assert snapshots_401k[0]['total_value'] == 100000
         assert snapshots_401k[-1]['total_value'] == 135000
         assert snapshots_401k[-1]['contributed'] == 10000
+        assert snapshots_roth[-1]['id'] == roth_id
+
+        assert manager.get_latest_snapshot_values(test_username) == {
+            '401k': manager.get_latest_snapshot_value(test_username, '401k'),
+            'Roth IRA': 61000,
+        }
+        assert manager.get_latest_snapshot_values('nonexistent_user_12345') == {}
+
+        assert manager.load_all_snapshots(test_username) == {
+            '401k': snapshots_401k,
+            'Roth IRA': snapshots_roth,
+        }
+
+        # Streaming form can stop after the first row without holding the
+        # connection for this or any other thread
+        rows = manager.iter_snapshots(test_username, '401k')
+        assert next(rows) == snapshots_401k[0]
+        assert not manager.db.in_transaction
+        reader = threading.Thread(target=manager.db.execute_query, args=("SELECT 1",))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        rows.close()
+
+        # Column-array form of the same series
+        dates, contributed, totals = manager.load_snapshots_arrays(test_username, '401k')
+        assert dates.dtype == np.dtype('datetime64[D]')
+        assert dates[-1] == np.datetime64('2024-12-31')
+        np.testing.assert_array_equal(contributed, [0, 10000, 10000])
+        np.testing.assert_array_equal(totals, [100000, 117000, 135000])
+
+        dates, contributed, totals = manager.load_snapshots_arrays(test_username, 'Missing')
+        assert dates.size == contributed.size == totals.size == 0
 
     def test_historical_year_summaries(self, manager, test_username):
         """Should aggregate snapshots into yearly summaries"""
@@ -466,6 +759,15 @@ class TestUserDataEdgeCases:
         # Should return None or empty structure
         assert profile is None or profile == {}
 
+    def test_user_exists(self, manager):
+        """Should report whether a profile has been saved for the user"""
+        import time
+        username = f"test_exists_{int(time.time() * 1000)}"
+
+        assert manager.user_exists(username) is False
+        manager.create_default_data_for_user(username)
+        assert manager.user_exists(username) is True
+
     def test_empty_accounts_list(self, manager):
         """Should handle saving empty accounts list"""
         import time
@@ -537,5 +839,30 @@ class TestUserDataEdgeCases:
         assert loaded[0]['planned_contribution'] == 15000
 
 
+    def test_save_accounts_syncs_by_name(self, manager):
+        """Saving should update kept accounts, add new ones and drop removed ones"""
+        import time
+        username = f"test_sync_{int(time.time() * 1000)}"
+
+        def account(name, balance, priority):
+            return {'name': name, 'balance': balance, 'return': 0.07,
+                    'priority': priority, 'account_type': 'roth_ira',
+                    'planned_contribution': 0, 'continue_post_retirement': False}
+
+        manager.save_user_accounts(username, [account('A', 1000, 1), account('B', 2000, 2)])
+        manager.save_user_accounts(username, [account('B', 2500, 1), account('C', 3000, 2)])
+
+        loaded = manager.load_user_accounts(username)
+        assert [(acc['name'], acc['balance']) for acc in loaded] == [('B', 2500), ('C', 3000)]
+
+        # A repeated name is renamed rather than overwriting the earlier account
+        manager.save_user_accounts(username, [account('B', 1, 1), account('B', 2, 2),
+                                              account('B (2)', 3, 3)])
+        loaded = manager.load_user_accounts(username)
+        assert [(acc['name'], acc['balance']) for acc in loaded] == [
+            ('B', 1), ('B (3)', 2), ('B (2)', 3)
+        ]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
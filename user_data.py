@@ -6,21 +6,298 @@ Supports both SQLite (local) and PostgreSQL (cloud deployment).
 Each user has their own set of accounts, expenses, and events.
 """
 
-from typing import Dict, List, Optional
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from operator import attrgetter
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
 from db_connection import get_db
 
 
+_SQL_SAVE_PROFILE = """
+    INSERT OR REPLACE INTO user_profiles
+    (username, current_age, target_age, ultimate_max_age, work_end_age, current_work_income,
+     work_income_growth, ss_start_age, ss_monthly_benefit, ss_cola,
+     inflation_rate, max_flex_reduction, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+"""
+
+# The stored rows of the delete-and-reinsert saves, in the order of their
+# parameters (for skipping saves that would rewrite identical rows)
+_SQL_STORED_ROWS = {
+    'expenses': """
+        SELECT username, name, amount, category_type
+        FROM user_expenses WHERE username = ? ORDER BY id
+    """,
+    'events': """
+        SELECT username, year, description, amount, account_name
+        FROM user_events WHERE username = ? ORDER BY id
+    """,
+}
+
+_SQL_LOAD_PROFILE = """
+    SELECT current_age, target_age, ultimate_max_age, work_end_age, current_work_income,
+           work_income_growth, ss_start_age, ss_monthly_benefit, ss_cola,
+           inflation_rate, max_flex_reduction
+    FROM user_profiles WHERE username = ?
+"""
+
+# In the order of the upsert's parameters
+_SQL_STORED_ACCOUNTS = """
+    SELECT username, name, balance, annual_return, contrib_share, priority,
+           account_type, planned_contribution, continue_post_retirement
+    FROM user_accounts WHERE username = ?
+"""
+
+_SQL_DELETE_ACCOUNT = "DELETE FROM user_accounts WHERE username = ? AND name = ?"
+
+# Accounts are keyed by (username, name): existing rows are updated in place
+_SQL_UPSERT_ACCOUNT = """
+    INSERT INTO user_accounts
+    (username, name, balance, annual_return, contrib_share, priority,
+     account_type, planned_contribution, continue_post_retirement)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (username, name) DO UPDATE SET
+        balance = excluded.balance,
+        annual_return = excluded.annual_return,
+        contrib_share = excluded.contrib_share,
+        priority = excluded.priority,
+        account_type = excluded.account_type,
+        planned_contribution = excluded.planned_contribution,
+        continue_post_retirement = excluded.continue_post_retirement
+"""
+
+_SQL_ALL_ACCOUNT_NAMES = "SELECT id, username, name FROM user_accounts ORDER BY username, id"
+
+_SQL_RENAME_ACCOUNT = "UPDATE user_accounts SET name = ? WHERE id = ?"
+
+# Defaults for columns added after the original schema are filled in SQL
+_SQL_LOAD_ACCOUNTS = """
+    SELECT name, balance, annual_return, contrib_share, priority,
+           COALESCE(NULLIF(account_type, ''), 'taxable_brokerage'),
+           COALESCE(planned_contribution, 0),
+           COALESCE(continue_post_retirement, 0)
+    FROM user_accounts WHERE username = ? ORDER BY priority
+"""
+_ACCOUNT_KEYS = ('name', 'balance', 'return', 'contrib_share', 'priority',
+                 'account_type', 'planned_contribution', 'continue_post_retirement')
+
+_SQL_DELETE_EXPENSES = "DELETE FROM user_expenses WHERE username = ?"
+
+_EXPENSE_COLUMNS = ('username', 'name', 'amount', 'category_type')
+
+_SQL_LOAD_EXPENSES = """
+    SELECT name, amount, category_type AS type
+    FROM user_expenses WHERE username = ?
+"""
+
+_SQL_DELETE_EVENTS = "DELETE FROM user_events WHERE username = ?"
+
+_EVENT_COLUMNS = ('username', 'year', 'description', 'amount', 'account_name')
+
+_SQL_LOAD_EVENTS = """
+    SELECT year, description, amount,
+           COALESCE(NULLIF(account_name, ''), 'No Account') AS account_name
+    FROM user_events WHERE username = ? ORDER BY year
+"""
+
+_SNAPSHOT_COLUMNS = ('username', 'account_name', 'snapshot_date',
+                     'amount_contributed', 'total_value')
+
+_SQL_SAVE_SNAPSHOT = """
+    INSERT INTO account_snapshots
+    (username, account_name, snapshot_date, amount_contributed, total_value)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_SQL_LOAD_SNAPSHOTS = """
+    SELECT id, snapshot_date AS date, amount_contributed AS contributed, total_value
+    FROM account_snapshots
+    WHERE username = ? AND account_name = ?
+    ORDER BY snapshot_date
+"""
+
+_SQL_ALL_SNAPSHOTS = """
+    SELECT account_name, id, snapshot_date AS date,
+           amount_contributed AS contributed, total_value
+    FROM account_snapshots
+    WHERE username = ?
+    ORDER BY account_name, snapshot_date
+"""
+
+_SQL_SNAPSHOT_SERIES = """
+    SELECT snapshot_date, amount_contributed, total_value
+    FROM account_snapshots
+    WHERE username = ? AND account_name = ?
+    ORDER BY snapshot_date
+"""
+
+_SQL_DELETE_SNAPSHOT = "DELETE FROM account_snapshots WHERE id = ? AND username = ?"
+
+_SQL_LATEST_SNAPSHOT_VALUE = """
+    SELECT total_value FROM account_snapshots
+    WHERE username = ? AND account_name = ?
+    ORDER BY snapshot_date DESC LIMIT 1
+"""
+
+_SQL_LATEST_SNAPSHOT_VALUES = """
+    SELECT account_name, total_value FROM (
+        SELECT account_name, total_value,
+               ROW_NUMBER() OVER (PARTITION BY account_name
+                                  ORDER BY snapshot_date DESC) AS rn
+        FROM account_snapshots
+        WHERE username = ?
+    ) latest
+    WHERE rn = 1
+"""
+
+_SQL_RENAME_SNAPSHOTS = """
+    UPDATE account_snapshots SET account_name = ?
+    WHERE username = ? AND account_name = ?
+"""
+
+_SQL_USER_SNAPSHOTS = """
+    SELECT account_name, snapshot_date, amount_contributed, total_value
+    FROM account_snapshots
+    WHERE username = ?
+    ORDER BY snapshot_date
+"""
+
+_SQL_USER_EXISTS = "SELECT 1 FROM user_profiles WHERE username = ? LIMIT 1"
+
+# Lightweight record for the snapshot rows aggregated by
+# get_historical_year_summaries (no per-row dict)
+_SnapshotPoint = namedtuple('_SnapshotPoint', 'date contributed total_value')
+
+
+# Bump when adding a migration to UserDataManager.init_database()
+SCHEMA_VERSION = 4
+
+
+# Starting configuration for new users (built once, read-only views)
+DEFAULT_PROFILE = MappingProxyType({
+    'current_age': 45,
+    'target_age': 90,
+    'ultimate_max_age': 110,
+    'work_end_age': 68,
+    'current_work_income': 35000,
+    'work_income_growth': 0.02,
+    'ss_start_age': 68,
+    'ss_monthly_benefit': 2500,
+    'ss_cola': 0.025,
+    'inflation_rate': 0.03,
+    'max_flex_reduction': 0.50
+})
+
+DEFAULT_ACCOUNTS = tuple(MappingProxyType(acc) for acc in [
+    {'name': '401k', 'account_type': '401k', 'balance': 2000,
+     'return': 0.08, 'contrib_share': 0, 'planned_contribution': 2700, 'priority': 1,
+     'continue_post_retirement': False},  # 401k contributions must stop at retirement
+    {'name': 'Roth IRA', 'account_type': 'roth_ira', 'balance': 500,
+     'return': 0.08, 'contrib_share': 0, 'planned_contribution': 700, 'priority': 2,
+     'continue_post_retirement': True},  # Roth IRA can continue indefinitely if you have income
+])
+
+DEFAULT_EXPENSES = tuple(MappingProxyType(exp) for exp in [
+    {'name': 'Housing', 'amount': 12000, 'type': 'CORE'},
+    {'name': 'Food', 'amount': 6000, 'type': 'CORE'},
+    {'name': 'Healthcare', 'amount': 800, 'type': 'CORE'},
+    {'name': 'Transportation', 'amount': 3600, 'type': 'CORE'},
+    {'name': 'Travel', 'amount': 1000, 'type': 'FLEX'},
+    {'name': 'Entertainment', 'amount': 2000, 'type': 'FLEX'},
+])
+
+DEFAULT_EVENTS = ()
+
+
+# Loaded profiles/accounts/expenses/events/snapshots kept per manager, keyed
+# by (kind, username) or, for snapshots, ('snapshots', (username, account));
+# least recently used entries are evicted beyond this
+USER_CACHE_SIZE = 256
+
+_MISSING = object()
+
+
+def _unique_account_names(names: Sequence[str]) -> List[str]:
+    """
+    Rename repeated account names to "name (2)", "name (3)", ...
+    
+    The first occurrence keeps its name and no new name collides with
+    another one in the list.
+    """
+    taken = set(names)
+    seen = set()
+    unique = []
+    for name in names:
+        if name in seen:
+            suffix = 2
+            while f'{name} ({suffix})' in taken:
+                suffix += 1
+            name = f'{name} ({suffix})'
+            taken.add(name)
+        seen.add(name)
+        unique.append(name)
+    return unique
+
+
+def _copy_loaded(value):
+    """Copy a cached load result so callers can't mutate the cache."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return dict(value)
+    return [dict(row) for row in value]
+
+
 class UserDataManager:
     """Manages user-specific retirement planning data."""
     
+    # Connections whose schema this process has already brought up to date
+    _schema_initialized = weakref.WeakSet()
+    
     def __init__(self, db_path: str = "user_data.db"):
         """Initialize the database connection."""
         # db_path parameter kept for backward compatibility but not used
         # Database connection is managed by db_connection module
         self.db = get_db()
-        self.init_database()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        if self.db not in UserDataManager._schema_initialized:
+            self.init_database()
+            UserDataManager._schema_initialized.add(self.db)
     
     def init_database(self):
+        """
+        Create or upgrade the schema.
+        
+        The schema version is recorded in the database (PRAGMA user_version
+        on SQLite), so once the schema is current this is a single lookup.
+        Each migration is idempotent, which also lets databases created
+        before versioning start from version 0.
+        """
+        version = self.db.get_schema_version()
+        if version >= SCHEMA_VERSION:
+            return
+        
+        self.db.enable_wal()
+        
+        migrations = [
+            (1, self._add_missing_columns),
+            (2, self._add_unique_account_names),
+            (3, self._add_lookup_indexes),
+            (4, self._cover_snapshot_index),
+        ]
+        with self.db.transaction():
+            self._create_tables()
+            for target_version, migrate in migrations:
+                if version < target_version:
+                    migrate()
+            self.db.set_schema_version(SCHEMA_VERSION)
+    
+    def _create_tables(self):
         """Create tables if they don't exist."""
         # User profiles table
         self.db.create_table_if_not_exists('user_profiles', """
@@ -82,7 +359,8 @@ class UserDataManager:
             FOREIGN KEY (username) REFERENCES user_profiles(username)
         """)
 
-        # Migration: add columns that may not exist in older databases
+    def _add_missing_columns(self):
+        """Migration 1: add columns that may not exist in older databases."""
         self.db.add_column_if_not_exists('user_accounts', 'account_type', 
                                          'TEXT', "'taxable_brokerage'")
         self.db.add_column_if_not_exists('user_accounts', 'planned_contribution', 
@@ -93,16 +371,131 @@ class UserDataManager:
                                          'TEXT', "''")
         self.db.add_column_if_not_exists('user_profiles', 'ultimate_max_age', 
                                          'INTEGER', '110')
+
+    def _add_unique_account_names(self):
+        """
+        Migration 2: make account names unique per user.
+        
+        Snapshots and events refer to accounts by name, and the index is the
+        conflict target for the account upsert. Duplicates from older
+        databases are renamed (oldest row keeps the name), not dropped.
+        """
+        if not self.db.index_exists('idx_accounts_user_name'):
+            rows_by_user: Dict[str, List[Tuple[int, str]]] = {}
+            for row_id, username, name in self.db.execute_query(_SQL_ALL_ACCOUNT_NAMES):
+                rows_by_user.setdefault(username, []).append((row_id, name))
+            renames = [
+                (new_name, row_id)
+                for rows in rows_by_user.values()
+                for (row_id, name), new_name in zip(
+                    rows, _unique_account_names([name for _, name in rows]))
+                if new_name != name
+            ]
+            if renames:
+                self.db.execute_many(_SQL_RENAME_ACCOUNT, renames)
+            self.db.create_index_if_not_exists('idx_accounts_user_name', 'user_accounts',
+                                               'username, name', unique=True)
+    
+    def _add_lookup_indexes(self):
+        """Migration 3: index the per-user lookups (and their ORDER BY columns)."""
+        created = [
+            self.db.create_index_if_not_exists('idx_accounts_user', 'user_accounts',
+                                               'username, priority'),
+            self.db.create_index_if_not_exists('idx_expenses_user', 'user_expenses',
+                                               'username'),
+            self.db.create_index_if_not_exists('idx_events_user', 'user_events',
+                                               'username, year'),
+            self.db.create_index_if_not_exists('idx_snapshots_user_account', 'account_snapshots',
+                                               'username, account_name, snapshot_date'),
+        ]
+        if any(created):
+            # Refresh planner statistics so the new indexes get used
+            self.db.execute_update("ANALYZE")
+    
+    def _cover_snapshot_index(self):
+        """
+        Migration 4: make the snapshot index covering.
+        
+        With the value columns appended (the id comes with the rowid),
+        snapshot loads and the latest-value lookup read only the index.
+        """
+        self.db.execute_update("DROP INDEX IF EXISTS idx_snapshots_user_account")
+        self.db.create_index_if_not_exists(
+            'idx_snapshots_user_account', 'account_snapshots',
+            'username, account_name, snapshot_date, amount_contributed, total_value')
     
-    def save_user_profile(self, username: str, profile: Dict):
+    @contextmanager
+    def batch(self):
+        """
+        Group many writes into one transaction (context manager).
+        
+        Saves made inside the block commit once at the end, or are all
+        rolled back if it raises.
+        
+        Example:
+            with manager.batch():
+                for snap in snapshots:
+                    manager.save_snapshot(username, name, *snap)
+        """
+        with self.db.transaction():
+            yield self
+    
+    # --- Load cache ---
+    
+    def _cached(self, kind: str, key):
+        """Return a copy of the cached load result, or _MISSING."""
+        with self._cache_lock:
+            value = self._cache.get((kind, key), _MISSING)
+            if value is _MISSING:
+                return _MISSING
+            self._cache.move_to_end((kind, key))
+        return _copy_loaded(value)
+    
+    def _remember(self, kind: str, key, value):
+        """
+        Cache a load result (a private copy of it) and return the value.
+        
+        Inside an enclosing transaction the rows may include writes that are
+        later rolled back, so the entry is dropped again if that happens.
+        """
+        self.db.on_rollback(lambda: self._invalidate(kind, key))
+        with self._cache_lock:
+            self._cache[(kind, key)] = _copy_loaded(value)
+            self._cache.move_to_end((kind, key))
+            if len(self._cache) > USER_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
+    
+    def _invalidate(self, kind: str, key):
+        """Drop a cached load result after its table is written."""
+        with self._cache_lock:
+            self._cache.pop((kind, key), None)
+    
+    def _invalidate_snapshots(self, username: str):
+        """Drop every cached snapshot list of a user."""
+        with self._cache_lock:
+            for cache_key in [k for k in self._cache
+                              if k[0] == 'snapshots' and k[1][0] == username]:
+                del self._cache[cache_key]
+    
+    def _unchanged(self, kind: str, username: str, rows: List[Tuple]) -> bool:
+        """
+        Whether rows equal what is stored for save_user_<kind>.
+        
+        Compares against the database (not this process's last save), so
+        writes by other processes are seen; call it inside the save's
+        transaction.
+        """
+        return self.db.execute_query(_SQL_STORED_ROWS[kind], (username,)) == rows
+    
+    def clear_cache(self):
+        """Forget all cached load results (e.g. after writes by another process)."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def save_user_profile(self, username: str, profile: Mapping):
         """Save or update user profile."""
-        self.db.execute_update("""
-            INSERT OR REPLACE INTO user_profiles 
-            (username, current_age, target_age, ultimate_max_age, work_end_age, current_work_income,
-             work_income_growth, ss_start_age, ss_monthly_benefit, ss_cola,
-             inflation_rate, max_flex_reduction, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
+        params = (
             username,
             profile.get('current_age'),
             profile.get('target_age'),
@@ -115,20 +508,21 @@ class UserDataManager:
             profile.get('ss_cola'),
             profile.get('inflation_rate'),
             profile.get('max_flex_reduction')
-        ))
+        )
+        self.db.execute_update(_SQL_SAVE_PROFILE, params)
+        self._invalidate('profile', username)
     
     def load_user_profile(self, username: str) -> Optional[Dict]:
-        """Load user profile."""
-        rows = self.db.execute_query("""
-            SELECT current_age, target_age, ultimate_max_age, work_end_age, current_work_income,
-                   work_income_growth, ss_start_age, ss_monthly_benefit, ss_cola,
-                   inflation_rate, max_flex_reduction
-            FROM user_profiles WHERE username = ?
-        """, (username,))
+        """Load user profile (cached until the next save_user_profile)."""
+        cached = self._cached('profile', username)
+        if cached is not _MISSING:
+            return cached
+        
+        rows = self.db.execute_query(_SQL_LOAD_PROFILE, (username,))
         
         if rows:
             row = rows[0]
-            return {
+            return self._remember('profile', username, {
                 'current_age': row[0],
                 'target_age': row[1],
                 'ultimate_max_age': row[2],
@@ -140,20 +534,43 @@ class UserDataManager:
                 'ss_cola': row[8],
                 'inflation_rate': row[9],
                 'max_flex_reduction': row[10]
+            })
+        return self._remember('profile', username, None)
+    
+    def load_user_bundle(self, username: str) -> Dict:
+        """
+        Load a user's profile, accounts, expenses and events together.
+        
+        The four SELECTs share one connection instead of each acquiring
+        (and committing) their own.
+        
+        Returns:
+            Dict with 'profile' (None if not saved), 'accounts', 'expenses'
+            and 'events'
+        """
+        with self.db.get_connection():
+            return {
+                'profile': self.load_user_profile(username),
+                'accounts': self.load_user_accounts(username),
+                'expenses': self.load_user_expenses(username),
+                'events': self.load_user_events(username),
             }
-        return None
     
-    def save_user_accounts(self, username: str, accounts: List[Dict]):
-        """Save user's investment accounts."""
-        # Delete existing accounts
-        self.db.execute_update("DELETE FROM user_accounts WHERE username = ?", (username,))
-
-        # Insert new accounts
+    def save_user_accounts(self, username: str, accounts: Sequence[Mapping]):
+        """
+        Save user's investment accounts.
+        
+        Accounts are matched by name: existing ones are updated in place,
+        new ones inserted and ones no longer listed deleted. A repeated
+        name is saved as "name (2)" rather than overwriting the earlier
+        account. Only accounts that differ from the stored ones are written.
+        """
+        names = _unique_account_names([acc['name'] for acc in accounts])
         params_list = []
-        for acc in accounts:
+        for acc, name in zip(accounts, names):
             params_list.append((
                 username,
-                acc['name'],
+                name,
                 acc['balance'],
                 acc['return'],
                 acc.get('contrib_share', 0),
@@ -162,44 +579,40 @@ class UserDataManager:
                 acc.get('planned_contribution', 0),
                 1 if acc.get('continue_post_retirement', False) else 0
             ))
+
+        keep_names = set(names)
         
-        if params_list:
-            self.db.execute_many("""
-                INSERT INTO user_accounts
-                (username, name, balance, annual_return, contrib_share, priority,
-                 account_type, planned_contribution, continue_post_retirement)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, params_list)
+        # Sync the stored accounts in one transaction (a single commit),
+        # writing only the rows that differ from what is stored
+        with self.db.transaction():
+            stored = {row[1]: tuple(row) for row in
+                      self.db.execute_query(_SQL_STORED_ACCOUNTS, (username,))}
+            removed = [(username, name) for name in stored if name not in keep_names]
+            changed = [params for params in params_list if stored.get(params[1]) != params]
+            if not removed and not changed:
+                return
+            if removed:
+                self.db.execute_many(_SQL_DELETE_ACCOUNT, removed)
+            if changed:
+                self.db.execute_many(_SQL_UPSERT_ACCOUNT, changed)
+        self._invalidate('accounts', username)
     
     def load_user_accounts(self, username: str) -> List[Dict]:
-        """Load user's investment accounts."""
-        rows = self.db.execute_query("""
-            SELECT name, balance, annual_return, contrib_share, priority,
-                   account_type, planned_contribution, continue_post_retirement
-            FROM user_accounts WHERE username = ? ORDER BY priority
-        """, (username,))
-        
-        accounts = []
-        for row in rows:
-            accounts.append({
-                'name': row[0],
-                'balance': row[1],
-                'return': row[2],
-                'contrib_share': row[3],
-                'priority': row[4],
-                'account_type': row[5] or 'taxable_brokerage',
-                'planned_contribution': row[6] or 0,
-                'continue_post_retirement': bool(row[7]) if row[7] is not None else False
-            })
-
-        return accounts
-    
-    def save_user_expenses(self, username: str, expenses: List[Dict]):
-        """Save user's expense categories."""
-        # Delete existing expenses
-        self.db.execute_update("DELETE FROM user_expenses WHERE username = ?", (username,))
+        """Load user's investment accounts (cached until the next save)."""
+        cached = self._cached('accounts', username)
+        if cached is not _MISSING:
+            return cached
         
-        # Insert new expenses
+        rows = self.db.execute_query(_SQL_LOAD_ACCOUNTS, (username,))
+        
+        # The flag is stored as 0/1
+        return self._remember('accounts', username, [
+            dict(zip(_ACCOUNT_KEYS, (*row[:7], bool(row[7]))))
+            for row in rows
+        ])
+    
+    def save_user_expenses(self, username: str, expenses: Sequence[Mapping]):
+        """Save user's expense categories (skipped if already stored)."""
         params_list = []
         for exp in expenses:
             params_list.append((
@@ -208,37 +621,27 @@ class UserDataManager:
                 exp['amount'],
                 exp['type']
             ))
-        
-        if params_list:
-            self.db.execute_many("""
-                INSERT INTO user_expenses 
-                (username, name, amount, category_type)
-                VALUES (?, ?, ?, ?)
-            """, params_list)
+
+        # Replace the existing expenses in one transaction (a single commit)
+        with self.db.transaction():
+            if self._unchanged('expenses', username, params_list):
+                return
+            self.db.execute_update(_SQL_DELETE_EXPENSES, (username,))
+            if params_list:
+                self.db.insert_rows('user_expenses', _EXPENSE_COLUMNS, params_list)
+        self._invalidate('expenses', username)
     
     def load_user_expenses(self, username: str) -> List[Dict]:
-        """Load user's expense categories."""
-        rows = self.db.execute_query("""
-            SELECT name, amount, category_type
-            FROM user_expenses WHERE username = ?
-        """, (username,))
-        
-        expenses = []
-        for row in rows:
-            expenses.append({
-                'name': row[0],
-                'amount': row[1],
-                'type': row[2]
-            })
+        """Load user's expense categories (cached until the next save)."""
+        cached = self._cached('expenses', username)
+        if cached is not _MISSING:
+            return cached
         
-        return expenses
+        return self._remember('expenses', username,
+                              self.db.execute_query_dicts(_SQL_LOAD_EXPENSES, (username,)))
     
-    def save_user_events(self, username: str, events: List[Dict]):
-        """Save user's one-time events."""
-        # Delete existing events
-        self.db.execute_update("DELETE FROM user_events WHERE username = ?", (username,))
-        
-        # Insert new events
+    def save_user_events(self, username: str, events: Sequence[Mapping]):
+        """Save user's one-time events (skipped if already stored)."""
         params_list = []
         for evt in events:
             params_list.append((
@@ -248,87 +651,122 @@ class UserDataManager:
                 evt['amount'],
                 evt.get('account_name', '')
             ))
-        
-        if params_list:
-            self.db.execute_many("""
-                INSERT INTO user_events 
-                (username, year, description, amount, account_name)
-                VALUES (?, ?, ?, ?, ?)
-            """, params_list)
+
+        # Replace the existing events in one transaction (a single commit)
+        with self.db.transaction():
+            if self._unchanged('events', username, params_list):
+                return
+            self.db.execute_update(_SQL_DELETE_EVENTS, (username,))
+            if params_list:
+                self.db.insert_rows('user_events', _EVENT_COLUMNS, params_list)
+        self._invalidate('events', username)
     
     def load_user_events(self, username: str) -> List[Dict]:
-        """Load user's one-time events."""
-        rows = self.db.execute_query("""
-            SELECT year, description, amount, account_name
-            FROM user_events WHERE username = ? ORDER BY year
-        """, (username,))
-        
-        events = []
-        for row in rows:
-            events.append({
-                'year': row[0],
-                'description': row[1],
-                'amount': row[2],
-                'account_name': row[3] if row[3] else 'No Account'
-            })
+        """Load user's one-time events (cached until the next save)."""
+        cached = self._cached('events', username)
+        if cached is not _MISSING:
+            return cached
         
-        return events
+        return self._remember('events', username,
+                              self.db.execute_query_dicts(_SQL_LOAD_EVENTS, (username,)))
     
     # --- Account Snapshot Methods ---
 
     def save_snapshot(self, username: str, account_name: str,
                       snapshot_date: str, amount_contributed: float,
-                      total_value: float):
-        """Record a point-in-time snapshot of an account's value."""
-        self.db.execute_update("""
-            INSERT INTO account_snapshots
-            (username, account_name, snapshot_date, amount_contributed, total_value)
-            VALUES (?, ?, ?, ?, ?)
-        """, (username, account_name, snapshot_date,
-              amount_contributed, total_value))
+                      total_value: float) -> int:
+        """Record a point-in-time snapshot of an account's value and return its id."""
+        snapshot_id = self.db.execute_insert(_SQL_SAVE_SNAPSHOT, (
+            username, account_name, snapshot_date, amount_contributed, total_value))
+        self._invalidate('snapshots', (username, account_name))
+        return snapshot_id
+
+    def save_snapshots(self, username: str,
+                       snapshots: List[Tuple[str, str, float, float]]):
+        """
+        Record many snapshots with multi-row inserts in one transaction.
+        
+        Args:
+            username: Owner of the snapshots
+            snapshots: (account_name, snapshot_date, amount_contributed,
+                total_value) tuples
+        """
+        if not snapshots:
+            return
+        self.db.insert_rows('account_snapshots', _SNAPSHOT_COLUMNS,
+                            [(username, *snap) for snap in snapshots])
+        for account_name in {snap[0] for snap in snapshots}:
+            self._invalidate('snapshots', (username, account_name))
+
+    def iter_snapshots(self, username: str, account_name: str) -> Iterator[Dict]:
+        """Yield an account's snapshots one at a time, ordered by date."""
+        return self.db.iter_query_dicts(_SQL_LOAD_SNAPSHOTS, (username, account_name))
 
     def load_snapshots(self, username: str, account_name: str) -> List[Dict]:
-        """Load all snapshots for an account, ordered by date."""
-        rows = self.db.execute_query("""
-            SELECT id, snapshot_date, amount_contributed, total_value
-            FROM account_snapshots
-            WHERE username = ? AND account_name = ?
-            ORDER BY snapshot_date
-        """, (username, account_name))
-
-        snapshots = []
-        for row in rows:
-            snapshots.append({
-                'id': row[0],
-                'date': row[1],
-                'contributed': row[2],
-                'total_value': row[3]
-            })
-        return snapshots
+        """Load all snapshots for an account, ordered by date (cached until changed)."""
+        cached = self._cached('snapshots', (username, account_name))
+        if cached is not _MISSING:
+            return cached
+        
+        return self._remember('snapshots', (username, account_name),
+                              list(self.iter_snapshots(username, account_name)))
+
+    def load_all_snapshots(self, username: str) -> Dict[str, List[Dict]]:
+        """
+        Load every snapshot of a user in one query.
+        
+        Returns:
+            Dict mapping account name to its snapshots (as load_snapshots
+            returns them), ordered by date
+        """
+        grouped = {}
+        for row in self.db.iter_query_dicts(_SQL_ALL_SNAPSHOTS, (username,)):
+            grouped.setdefault(row.pop('account_name'), []).append(row)
+        return grouped
+
+    def load_snapshots_arrays(self, username: str, account_name: str
+                              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Load an account's snapshots as column arrays, ordered by date.
+        
+        Returns:
+            (dates as datetime64[D], amounts contributed, total values), the
+            latter two as float64 - ready for charting without per-row loops
+        """
+        rows = self.db.execute_query(_SQL_SNAPSHOT_SERIES, (username, account_name))
+        dates, contributed, totals = zip(*rows) if rows else ((), (), ())
+        return (np.array(dates, dtype='datetime64[D]'),
+                np.array(contributed, dtype=np.float64),
+                np.array(totals, dtype=np.float64))
 
     def delete_snapshot(self, username: str, snapshot_id: int):
         """Delete a single snapshot by ID."""
-        self.db.execute_update(
-            "DELETE FROM account_snapshots WHERE id = ? AND username = ?",
-            (snapshot_id, username))
+        self.db.execute_update(_SQL_DELETE_SNAPSHOT, (snapshot_id, username))
+        # The id doesn't say which account it belonged to
+        self._invalidate_snapshots(username)
 
     def get_latest_snapshot_value(self, username: str,
                                   account_name: str):
         """Return the total_value from the most recent snapshot, or None."""
-        rows = self.db.execute_query("""
-            SELECT total_value FROM account_snapshots
-            WHERE username = ? AND account_name = ?
-            ORDER BY snapshot_date DESC LIMIT 1
-        """, (username, account_name))
+        rows = self.db.execute_query(_SQL_LATEST_SNAPSHOT_VALUE, (username, account_name))
         return rows[0][0] if rows else None
 
+    def get_latest_snapshot_values(self, username: str) -> Dict[str, float]:
+        """
+        Return the most recent snapshot total_value of every account at once.
+        
+        Returns:
+            Dict mapping account name to its latest total_value (accounts
+            without snapshots are absent)
+        """
+        return dict(self.db.execute_query(_SQL_LATEST_SNAPSHOT_VALUES, (username,)))
+
     def rename_account_snapshots(self, username: str, old_name: str,
                                   new_name: str):
         """Update snapshot records when an account is renamed."""
-        self.db.execute_update("""
-            UPDATE account_snapshots SET account_name = ?
-            WHERE username = ? AND account_name = ?
-        """, (new_name, username, old_name))
+        self.db.execute_update(_SQL_RENAME_SNAPSHOTS, (new_name, username, old_name))
+        self._invalidate('snapshots', (username, old_name))
+        self._invalidate('snapshots', (username, new_name))
 
     def get_historical_year_summaries(self, username: str) -> List[Dict]:
         """
@@ -347,12 +785,7 @@ class UserDataManager:
         from collections import defaultdict
         
         # Get all snapshots for this user, across all accounts
-        rows = self.db.execute_query("""
-            SELECT account_name, snapshot_date, amount_contributed, total_value
-            FROM account_snapshots
-            WHERE username = ?
-            ORDER BY snapshot_date
-        """, (username,))
+        rows = self.db.execute_query(_SQL_USER_SNAPSHOTS, (username,))
         
         if not rows:
             return []
@@ -361,16 +794,10 @@ class UserDataManager:
         # For each year+account combo, track all snapshots
         yearly_account_data = defaultdict(lambda: defaultdict(list))
         
-        for row in rows:
-            account_name, date_str, contributed, total_value = row
+        for account_name, date_str, contributed, total_value in rows:
             date = datetime.strptime(date_str, '%Y-%m-%d')
-            calendar_year = date.year
-            
-            yearly_account_data[calendar_year][account_name].append({
-                'date': date,
-                'contributed': contributed,
-                'total_value': total_value
-            })
+            yearly_account_data[date.year][account_name].append(
+                _SnapshotPoint(date, contributed, total_value))
         
         # Build year-by-year summaries
         results = []
@@ -384,7 +811,7 @@ class UserDataManager:
             # For each account in this year
             for account_name, snapshots in yearly_account_data[calendar_year].items():
                 # Sort snapshots by date (should already be sorted, but be sure)
-                snapshots.sort(key=lambda s: s['date'])
+                snapshots.sort(key=attrgetter('date'))
                 
                 # First snapshot in this year for this account
                 first_snapshot = snapshots[0]
@@ -393,15 +820,15 @@ class UserDataManager:
                 
                 # Starting balance for this account this year:
                 # It's the first snapshot's value minus its contribution
-                account_start = first_snapshot['total_value'] - first_snapshot['contributed']
+                account_start = first_snapshot.total_value - first_snapshot.contributed
                 year_start_total += account_start
                 
                 # Ending balance is the last snapshot's value
-                year_end_total += last_snapshot['total_value']
+                year_end_total += last_snapshot.total_value
                 
                 # Sum all contributions for this account this year
                 for snapshot in snapshots:
-                    year_contributions += snapshot['contributed']
+                    year_contributions += snapshot.contributed
             
             # For the first year, if we had no previous data, use the computed start
             if previous_year_total is None:
@@ -431,50 +858,30 @@ class UserDataManager:
 
     def user_exists(self, username: str) -> bool:
         """Check if user has saved data."""
-        rows = self.db.execute_query("""
-            SELECT COUNT(*) FROM user_profiles WHERE username = ?
-        """, (username,))
-        
-        count = rows[0][0] if rows else 0
-        return count > 0
+        # Stops at the first primary-key match instead of counting rows
+        return bool(self.db.execute_query(_SQL_USER_EXISTS, (username,)))
     
     def create_default_data_for_user(self, username: str):
         """Create default configuration for a new user."""
-        default_profile = {
-            'current_age': 45,
-            'target_age': 90,
-            'ultimate_max_age': 110,
-            'work_end_age': 68,
-            'current_work_income': 35000,
-            'work_income_growth': 0.02,
-            'ss_start_age': 68,
-            'ss_monthly_benefit': 2500,
-            'ss_cola': 0.025,
-            'inflation_rate': 0.03,
-            'max_flex_reduction': 0.50
-        }
-        
-        default_accounts = [
-            {'name': '401k', 'account_type': '401k', 'balance': 2000,
-             'return': 0.08, 'contrib_share': 0, 'planned_contribution': 2700, 'priority': 1,
-             'continue_post_retirement': False},  # 401k contributions must stop at retirement
-            {'name': 'Roth IRA', 'account_type': 'roth_ira', 'balance': 500,
-             'return': 0.08, 'contrib_share': 0, 'planned_contribution': 700, 'priority': 2,
-             'continue_post_retirement': True},  # Roth IRA can continue indefinitely if you have income
-        ]
-        
-        default_expenses = [
-            {'name': 'Housing', 'amount': 12000, 'type': 'CORE'},
-            {'name': 'Food', 'amount': 6000, 'type': 'CORE'},
-            {'name': 'Healthcare', 'amount': 800, 'type': 'CORE'},
-            {'name': 'Transportation', 'amount': 3600, 'type': 'CORE'},
-            {'name': 'Travel', 'amount': 1000, 'type': 'FLEX'},
-            {'name': 'Entertainment', 'amount': 2000, 'type': 'FLEX'},
-        ]
-        
-        default_events = []
-        
-        self.save_user_profile(username, default_profile)
-        self.save_user_accounts(username, default_accounts)
-        self.save_user_expenses(username, default_expenses)
-        self.save_user_events(username, default_events)
+        # The nested saves share this transaction, so the user is provisioned
+        # with a single commit (or not at all)
+        with self.db.transaction():
+            self.save_user_profile(username, DEFAULT_PROFILE)
+            self.save_user_accounts(username, DEFAULT_ACCOUNTS)
+            self.save_user_expenses(username, DEFAULT_EXPENSES)
+            self.save_user_events(username, DEFAULT_EVENTS)
+
+
+# Global user data manager instance (shares its load cache across sessions)
+_user_data_manager = None
+_user_data_manager_lock = threading.Lock()
+
+
+def get_user_data_manager() -> UserDataManager:
+    """Get the global user data manager instance."""
+    global _user_data_manager
+    if _user_data_manager is None:
+        with _user_data_manager_lock:
+            if _user_data_manager is None:
+                _user_data_manager = UserDataManager()
+    return _user_data_manager